@@ -1,13 +1,35 @@
 from jose import jwt,JWTError
 from datetime import timedelta,datetime
+from dataclasses import dataclass
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from services.metrics import Counter
 
 SECRET_KEY = "fastapi"
 EXPIRE_TIME = 30
 ALGORITHM = "HS256"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+TOKEN_CACHE = Counter("token_cache_requests_total", "Verified-token cache lookups", labels=("result",))
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    role: str
+    exp: int
+
+
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+
+
 def create_access_token(data:dict):
     encode_text = data.copy()
     expire = (datetime.now()+timedelta(minutes = EXPIRE_TIME))
@@ -16,9 +38,30 @@ def create_access_token(data:dict):
     return token
 
 
-def decode_token(token: str = Depends(oauth2_scheme)):
+async def decode_token(token: str = Depends(oauth2_scheme)):
+    # Tokens are re-sent on every Streamlit rerun; remember the ones already
+    # verified (keyed by digest, never the raw token) until they expire.
+    # Async so that async routes resolve it on the event loop; an HS256 check
+    # is cheap enough not to need the threadpool.
+    key = hashlib.sha256(token.encode()).digest()
+    with _verified_lock:
+        principal = _verified.get(key)
+        if principal is not None:
+            if principal.exp > time.time():
+                _verified.move_to_end(key)
+                TOKEN_CACHE.inc(result="hit")
+                return principal
+            del _verified[key]
+    TOKEN_CACHE.inc(result="miss")
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload  
-    except:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+        principal = Principal(user_id=payload["user_id"], role=payload["role"], exp=payload["exp"])
+    except (JWTError, KeyError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    with _verified_lock:
+        _verified[key] = principal
+        if len(_verified) > TOKEN_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return principal
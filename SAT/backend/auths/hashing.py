@@ -0,0 +1,78 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException
+from passlib.hash import argon2
+from services.metrics import Counter
+
+# Argon2 is deliberately slow and memory hungry, so it runs in its own small
+# process pool instead of the threadpool that serves every other request.
+# At most HASH_QUEUE_LIMIT calls may be running or waiting; beyond that the
+# caller gets a 503 straight away rather than queueing behind a login burst.
+# A pool broken by a crashed or OOM-killed worker is replaced and the call
+# retried once; if the new pool breaks as well the caller gets a 503 too.
+
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(HASH_WORKERS * 4)))
+HASH_RETRY_AFTER = os.getenv("HASH_RETRY_AFTER", "2")
+
+HASH_REJECTED = Counter("password_hash_rejected_total", "Password hash calls refused because the queue was full")
+HASH_POOL_RESTARTS = Counter("password_hash_pool_restarts_total", "Hashing process pools replaced after a worker died")
+
+_hasher = argon2.using(rounds=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM)
+_slots = threading.BoundedSemaphore(HASH_QUEUE_LIMIT)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hash(password: str):
+    return _hasher.hash(password)
+
+
+def _verify(password: str, hashed: str):
+    return argon2.verify(password, hashed)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        return _pool
+
+
+def _discard_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:  # other callers may have replaced it already
+            _pool = None
+            HASH_POOL_RESTARTS.inc()
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        HASH_REJECTED.inc()
+        raise HTTPException(503, "Server busy, please retry", headers={"Retry-After": HASH_RETRY_AFTER})
+    try:
+        for _ in range(2):
+            pool = _get_pool()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                _discard_pool(pool)
+        raise HTTPException(503, "Server busy, please retry", headers={"Retry-After": HASH_RETRY_AFTER})
+    finally:
+        _slots.release()
+
+
+def hash_password(password: str):
+    return _run(_hash, password)
+
+
+def verify_password(password: str, hashed: str):
+    return _run(_verify, password, hashed)
@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+import httpx
+from sqlalchemy import func, select
+from database.db import SessionLocal, DATABASE_URL
+from models.table_schema import Users, TeacherStudentMap, Attendance
+from benchmarks.seed import PASSWORD
+
+# Latency/throughput benchmark for the main endpoints against a seeded
+# database (see benchmarks/seed.py). Runs in-process through the ASGI app or
+# against a live server, and writes JSON that can be compared between runs:
+#
+#   python -m benchmarks.run --out before.json
+#   python -m benchmarks.run --url http://127.0.0.1:8000 --out after.json --compare before.json
+#
+# Roll call writes attendance for dates after the seeded range, so run it on
+# a scratch database. The report scenarios repeat the same queries, so with
+# the report cache on they mostly measure cache hits; --no-report-cache
+# measures the queries themselves (for --url, start the server with
+# REPORT_CACHE=off instead).
+
+SCENARIOS = ["login", "roll_call", "attendance_report_teacher", "attendance_report_admin_page",
+             "student_wise_report", "month_wise_report"]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summary(latencies, errors, wall):
+    ms = [v * 1000 for v in latencies]
+    # errors maps HTTP status to count; /login answers 503 once the hash queue is full.
+    return {"requests": len(latencies), "errors": {str(k): v for k, v in sorted(errors.items())}, "throughput_rps": round(len(latencies) / wall, 1),
+            "mean_ms": round(statistics.fmean(ms), 2), "p50_ms": round(_percentile(ms, 50), 2),
+            "p95_ms": round(_percentile(ms, 95), 2), "p99_ms": round(_percentile(ms, 99), 2)}
+
+
+async def _drive(requests, concurrency):
+    latencies, errors = [], {}
+    queue = iter(requests)
+
+    async def worker():
+        for make in queue:
+            started = time.perf_counter()
+            res = await make()
+            latencies.append(time.perf_counter() - started)
+            if res.status_code >= 400:
+                errors[res.status_code] = errors.get(res.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, errors, time.perf_counter() - started)
+
+
+def _school():
+    with SessionLocal() as db:
+        roster = {}
+        for teacher_id, student_id in db.execute(select(TeacherStudentMap.teacher_id, TeacherStudentMap.student_id)):
+            roster.setdefault(teacher_id, []).append(student_id)
+        last_day = db.scalar(select(func.max(Attendance.date)))
+        emails = dict(db.execute(select(Users.user_id, Users.email)).all())
+    if not roster or last_day is None:
+        sys.exit("no seeded data found; run python -m benchmarks.seed first")
+    return roster, last_day, emails
+
+
+async def _token(client, email):
+    res = await client.post("/login", json={"email": email, "password": PASSWORD})
+    res.raise_for_status()
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+async def run(client, n, concurrency, only):
+    roster, last_day, emails = _school()
+    teacher_ids = sorted(roster)
+    admin = await _token(client, emails[1])
+    teachers = {t: await _token(client, emails[t]) for t in teacher_ids[:concurrency * 2]}
+    active = list(teachers)
+
+    def login(i):
+        return lambda: client.post("/login", json={"email": emails[teacher_ids[i % len(teacher_ids)]],
+                                                   "password": PASSWORD})
+
+    def roll_call(i):
+        # Each request marks a distinct (student, date) pair after the seeded range.
+        teacher = active[i % len(active)]
+        students = roster[teacher]
+        day = last_day + timedelta(days=1 + (i // len(active)) // len(students))
+        student = students[(i // len(active)) % len(students)]
+        return lambda: client.post("/teacher/attendance", headers=teachers[teacher],
+                                   json={"student_id": student, "date": day.isoformat(), "status": True})
+
+    def get(path, headers, params=None):
+        return lambda i: (lambda: client.get(path, headers=headers(i), params=params))
+
+    builders = {
+        "login": login,
+        "roll_call": roll_call,
+        "attendance_report_teacher": get("/attendance/report", lambda i: teachers[active[i % len(active)]]),
+        "attendance_report_admin_page": get("/attendance/report", lambda i: admin, {"limit": 500}),
+        "student_wise_report": get("/admin/report/student-wise", lambda i: admin),
+        "month_wise_report": get("/admin/report/month-wise", lambda i: admin),
+    }
+    results = {}
+    for name in SCENARIOS:
+        if only and name not in only:
+            continue
+        count = min(n, 50) if name == "login" else n
+        results[name] = await _drive([builders[name](i) for i in range(count)], concurrency)
+        print(f"{name:32} {json.dumps(results[name])}")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(current, previous, threshold):
+    regressions = []
+    for name, now in current.items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        print(f"{name:32} p95 {before['p95_ms']:>9} -> {now['p95_ms']:>9} ms ({change:+.1f}%)")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the attendance API")
+    parser.add_argument("--url", help="base URL of a running server; default runs the app in-process")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", nargs="*", choices=SCENARIOS)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="previous results JSON to compare p95 against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="p95 regression %% that fails --compare")
+    parser.add_argument("--no-report-cache", action="store_true",
+                        help="compute every report (in-process only; start a --url server with REPORT_CACHE=off)")
+    args = parser.parse_args(argv)
+    if args.url and args.no_report_cache:
+        parser.error("--no-report-cache runs in-process; start the server with REPORT_CACHE=off instead")
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from main import app
+        if args.no_report_cache:
+            from services import report_cache
+            report_cache.BACKEND = None
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    async with client:
+        scenarios = await run(client, args.requests, args.concurrency, args.only)
+
+    report = {"meta": {"timestamp": datetime.now(timezone.utc).isoformat(), "commit": _git_commit(),
+                       "mode": "http" if args.url else "in-process", "url": args.url,
+                       "database": DATABASE_URL if not args.url else None,
+                       "requests": args.requests, "concurrency": args.concurrency,
+                       "python": platform.python_version(), "db_async": os.getenv("DB_ASYNC", "true"),
+                       "report_cache": None if args.url else "off" if args.no_report_cache else os.getenv("REPORT_CACHE", "memory")},
+              "scenarios": scenarios}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(scenarios, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(f"p95 regressed more than {args.threshold}% in: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
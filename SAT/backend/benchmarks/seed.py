@@ -0,0 +1,101 @@
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+from passlib.hash import argon2
+from database.db import SessionLocal, engine
+from models.table_schema import Base, Users, Students, TeacherStudentMap, Attendance
+from services.summary import rebuild_summaries
+from services.bitmap import rebuild_bitmaps
+from services.alerts import rebuild_alerts
+from services.changes import backfill_changes
+from services.versions import bump_versions,USERS,STUDENTS,ASSIGNMENTS
+
+# Synthetic school for benchmarks and query-plan checks: one admin, N
+# teachers each owning a class-sized roster, and weekday attendance for
+# every student over the requested number of school days.
+#
+#   DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --teachers 50 --students 2000 --days 180
+#
+# Logins: admin@school.example.com and t<user_id>@school.example.com, password "password".
+
+PASSWORD = "password"
+FIRST_NAMES = ["Aarav", "Priya", "Rahul", "Divya", "Karthik", "Meena", "Arjun", "Lakshmi", "Vikram", "Anitha",
+               "Suresh", "Kavya", "Ravi", "Deepa", "Naveen", "Sneha", "Ganesh", "Pooja", "Hari", "Nithya"]
+LAST_NAMES = ["Kumar", "Sharma", "Raj", "Iyer", "Nair", "Reddy", "Pillai", "Menon", "Das", "Rao"]
+BATCH = 5000
+
+
+def school_days(first_day: date, count: int):
+    days, day = [], first_day
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def seed_school(session: Session, teachers: int, students: int, days: int, first_day: date, seed: int = 7):
+    rng = random.Random(seed)
+    password = argon2.hash(PASSWORD)
+    per_teacher = max(1, students // teachers)
+
+    session.execute(insert(Users), [{"user_id": 1, "name": "Admin", "email": "admin@school.example.com",
+                                     "password": password, "role": "admin"}] +
+                    [{"user_id": t, "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                      "email": f"t{t}@school.example.com", "password": password, "role": "teacher"}
+                     for t in range(2, teachers + 2)])
+    session.execute(insert(Students), [{"std_id": s, "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                                        "roll_number": f"R{s:06d}", "std_class": (s - 1) // per_teacher % 12 + 1}
+                                       for s in range(1, students + 1)])
+    owner = {s: min((s - 1) // per_teacher, teachers - 1) + 2 for s in range(1, students + 1)}
+    session.execute(insert(TeacherStudentMap), [{"teacher_id": t, "student_id": s} for s, t in owner.items()])
+
+    # Most students attend ~95% of days; a few are chronically absent.
+    presence = {s: rng.choice([0.97] * 8 + [0.85, 0.6]) for s in owner}
+    seeded = school_days(first_day, days)
+    rows = []
+    for day in seeded:
+        for s, t in owner.items():
+            rows.append({"student_id": s, "date": day, "status": rng.random() < presence[s], "marked_by_teacher": t})
+            if len(rows) >= BATCH:
+                session.execute(insert(Attendance), rows)
+                rows = []
+    if rows:
+        session.execute(insert(Attendance), rows)
+    bump_versions(session, USERS, STUDENTS, ASSIGNMENTS)
+    session.commit()
+
+    rebuild_summaries(session)
+    rebuild_bitmaps(session)
+    rebuild_alerts(session)
+    backfill_changes(session)
+    session.execute(text("ANALYZE"))
+    session.commit()
+    return seeded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a synthetic school into DATABASE_URL")
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=180, help="school days (weekdays) of attendance")
+    parser.add_argument("--first-day", type=date.fromisoformat, default=date(2025, 6, 2))
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        if session.query(Users).first() is not None:
+            sys.exit("database is not empty; use --reset to replace it")
+        seeded = seed_school(session, args.teachers, args.students, args.days, args.first_day)
+    print(f"seeded {args.teachers} teachers, {args.students} students, "
+          f"{len(seeded)} days ({seeded[0]} .. {seeded[-1]})")
+
+
+if __name__ == "__main__":
+    main()
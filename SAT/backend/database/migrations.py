@@ -0,0 +1,50 @@
+from sqlalchemy import text, inspect
+
+# Versioned schema changes for databases created before the models declared
+# them. Fresh databases get the same objects from create_all(); every step
+# must therefore be idempotent. Append new steps, never edit applied ones.
+# A step is SQL text, or a callable taking the connection for changes that
+# SQL cannot make conditionally.
+
+
+def add_column(table, column, ddl):
+    def step(conn):
+        if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+MIGRATIONS = [
+    (1, "access path indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_attendance_date_student_status ON attendance (date, student_id, status)",
+        "CREATE INDEX IF NOT EXISTS ix_attendance_marked_by_teacher ON attendance (marked_by_teacher)",
+        "CREATE INDEX IF NOT EXISTS ix_teacher_student_map_student ON teacher_student_map (student_id, teacher_id)",
+        "CREATE INDEX IF NOT EXISTS ix_users_role ON users (role)",
+    ]),
+    (2, "class filter index", [
+        "CREATE INDEX IF NOT EXISTS ix_students_class ON students (std_class, std_id)",
+    ]),
+    (3, "attendance change feed", [
+        add_column("attendance", "change_seq", "INTEGER NOT NULL DEFAULT 0"),
+        "CREATE INDEX IF NOT EXISTS ix_attendance_change_seq ON attendance (change_seq)",
+    ]),
+]
+
+
+def current_version(conn):
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name VARCHAR NOT NULL)"))
+        applied = current_version(conn)
+        for version, name, statements in MIGRATIONS:
+            if version <= applied:
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(text("INSERT INTO schema_version (version, name) VALUES (:v, :n)"), {"v": version, "n": name})
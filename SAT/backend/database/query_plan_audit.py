@@ -0,0 +1,152 @@
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from types import SimpleNamespace
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from auths.auth import Principal
+from database.db import make_engine
+from database.migrations import run_migrations
+from models.schema import ReportFilters
+from models.table_schema import Base
+from services import content
+from benchmarks.seed import seed_school, school_days, PASSWORD
+
+# Seeds a throwaway SQLite database, runs the service functions in
+# services/content.py against it, and checks EXPLAIN QUERY PLAN for every
+# statement they issue. Exits non-zero when a statement scans a whole table
+# that the function is not expected to read in full.
+#
+#   python -m database.query_plan_audit
+
+TEACHERS = 50
+STUDENTS_PER_TEACHER = 40
+SCHOOL_DAYS = 120
+FIRST_DAY = date(2025, 6, 2)
+LAST_DAY = school_days(FIRST_DAY, SCHOOL_DAYS)[-1]
+
+# Listings that return every row by design, and the summary tables that are
+# O(students) / O(months) on purpose.
+ALLOWED_SCANS = {
+    "get_all_students": {"students"},
+    "get_all_users": {"users"},
+    "attendance_report (admin)": {"attendance"},
+    "attendance_report_page (first page)": {"attendance"},
+    "student_wise_report": {"student_attendance_summary"},
+    "student_wise_report (range)": {"attendance_bitmap"},
+    "student_wise_report (class, range)": {"attendance_bitmap"},
+    "month_wise_report": {"month_attendance_summary"},
+    # table_version holds a handful of counters.
+    "attendance_changes (admin)": {"table_version"},
+    "attendance_changes (teacher, since)": {"table_version"},
+}
+
+
+def scenarios():
+    admin = Principal(user_id=1, role="admin", exp=0)
+    teacher = Principal(user_id=2, role="teacher", exp=0)
+    last_day = LAST_DAY
+    today = last_day + timedelta(days=1)
+    week = ReportFilters(date_from=last_day - timedelta(days=6), date_to=last_day)
+    return [
+        ("login_user", lambda db: content.login_user("admin@school.example.com", PASSWORD, db)),
+        ("get_teachers", lambda db: content.get_teachers(db)),
+        ("get_all_students", lambda db: content.get_all_students(admin, db)),
+        ("get_all_users", lambda db: content.get_all_users(admin, db)),
+        ("fetch_assigned_students", lambda db: content.fetch_assigned_students(teacher, db)),
+        ("mark_attendance", lambda db: content.mark_attendance(
+            db, SimpleNamespace(student_id=1, date=today, status=True, overwrite=False), teacher)),
+        ("mark_attendance (overwrite)", lambda db: content.mark_attendance(
+            db, SimpleNamespace(student_id=1, date=today, status=False, overwrite=True), teacher)),
+        ("bulk_mark_attendance", lambda db: content.bulk_mark_attendance(
+            db, SimpleNamespace(date=today, records=[SimpleNamespace(student_id=s, status=True)
+                                                     for s in range(2, STUDENTS_PER_TEACHER + 1)]), teacher)),
+        ("update_attendance", lambda db: content.update_attendance(
+            SimpleNamespace(student_id=1, date=last_day, status=False), teacher, db)),
+        ("bulk_assign_students (class)", lambda db: content.bulk_assign_students(
+            SimpleNamespace(teacher_id=3, student_ids=None, std_class=3), admin, db)),
+        ("bulk_unassign_students (list)", lambda db: content.bulk_unassign_students(
+            SimpleNamespace(teacher_id=3, student_ids=list(range(1, 21)), std_class=None), admin, db)),
+        ("attendance_report (admin)", lambda db: content.attendance_report(admin, db)),
+        ("attendance_report (teacher)", lambda db: content.attendance_report(teacher, db)),
+        ("attendance_report_page (first page)", lambda db: content.attendance_report_page(admin, db)),
+        ("attendance_report_page (cursor)", lambda db: content.attendance_report_page(
+            admin, db, f"{last_day.isoformat()}:1")),
+        ("enriched_attendance_report (week)", lambda db: content.enriched_attendance_report(
+            admin, ReportFilters(date_from=last_day - timedelta(days=6), date_to=last_day), db)),
+        ("enriched_attendance_report (teacher)", lambda db: content.enriched_attendance_report(
+            teacher, ReportFilters(), db)),
+        ("student_wise_report", lambda db: content.student_wise_report(admin, db)),
+        ("student_wise_report (range)", lambda db: content.student_wise_report(admin, db, week)),
+        ("student_wise_report (teacher)", lambda db: content.student_wise_report(teacher, db)),
+        ("student_wise_report (class, range)", lambda db: content.student_wise_report(
+            admin, db, ReportFilters(std_class=3, date_from=week.date_from, date_to=last_day))),
+        ("student_wise_report (marked by)", lambda db: content.student_wise_report(
+            admin, db, ReportFilters(teacher_id=2, date_from=week.date_from, date_to=last_day))),
+        ("attendance_changes (admin)", lambda db: content.attendance_changes(admin, db)),
+        ("attendance_changes (teacher, since)", lambda db: content.attendance_changes(teacher, db, "1000.1")),
+        ("attendance_report (week)", lambda db: content.attendance_report(admin, db, week)),
+        ("month_wise_report", lambda db: content.month_wise_report(admin, db)),
+        ("month_wise_report (range)", lambda db: content.month_wise_report(admin, db, week)),
+        ("absentee_alerts", lambda db: content.absentee_alerts(admin, db)),
+        ("assign_student", lambda db: content.assign_student(
+            SimpleNamespace(teacher_id=3, student_id=1), admin, db)),
+        ("unassign_student", lambda db: content.unassign_student(3, 1, admin, db)),
+        ("update_student", lambda db: content.update_student(
+            5, SimpleNamespace(name="renamed", roll_number="R00005", std_class=3), admin, db)),
+        ("delete_student", lambda db: content.delete_student(6, admin, db)),
+        ("update_teacher", lambda db: content.update_teacher(
+            3, SimpleNamespace(name="renamed", email="renamed@school.example.com"), admin, db)),
+        ("delete_teacher", lambda db: content.delete_teacher(TEACHERS + 1, admin, db)),
+    ]
+
+
+def full_scans(conn, statement, parameters):
+    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    # Scans of subquery results read rows already selected by the plan steps above them.
+    derived = {row[-1].split(maxsplit=1)[1] for row in plan if row[-1].startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    scans = set()
+    for row in plan:
+        detail = row[-1]
+        if detail.startswith("SCAN ") and not detail.startswith("SCAN CONSTANT"):
+            scans.add(detail.split()[1])
+    return scans - derived
+
+
+def audit():
+    path = os.path.join(tempfile.mkdtemp(), "audit.db")
+    engine = make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    with Session() as session:
+        seed_school(session, TEACHERS, TEACHERS * STUDENTS_PER_TEACHER, SCHOOL_DAYS, FIRST_DAY)
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT INTO")):
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    failures = []
+    for name, call in scenarios():
+        captured.clear()
+        with Session() as session:
+            call(session)
+        statements = list(captured)
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                unexpected = full_scans(conn, statement, parameters) - ALLOWED_SCANS.get(name, set())
+                if unexpected:
+                    failures.append((name, sorted(unexpected), " ".join(statement.split())))
+        print(f"{'FAIL' if any(f[0] == name for f in failures) else 'ok  '} {name} ({len(statements)} statements)")
+
+    for name, tables, statement in failures:
+        print(f"\n{name}: full scan of {', '.join(tables)}\n  {statement}")
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if audit() else 1)
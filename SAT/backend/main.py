@@ -1,6 +1,29 @@
 from fastapi import FastAPI
-from routes.route import router
+from routes.route import router, read_router
+from database.db import SessionLocal, DB_ASYNC, engine
+from services.summary import backfill_summaries
+from services.bitmap import backfill_bitmaps
+from services.alerts import backfill_alerts
+from services.changes import backfill_changes
+from services.instrumentation import instrument_engine, request_metrics
 
 app = FastAPI(Title = 'Student_Attendance_Tracker')
 
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+
+if DB_ASYNC:
+    from routes.async_route import read_router as async_read_router
+    from database.db import async_engine
+    app.include_router(async_read_router)
+    instrument_engine(async_engine.sync_engine)
+else:
+    app.include_router(read_router)
+
+instrument_engine(engine)
+app.middleware("http")(request_metrics)
+
+with SessionLocal() as db:
+    backfill_summaries(db)
+    backfill_bitmaps(db)
+    backfill_alerts(db)
+    backfill_changes(db)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, model_validator
 from datetime import date
+from typing import Optional
 
 
 
@@ -29,6 +30,13 @@ class UpdateStudent(BaseModel):
     std_class: int
 
 
+class StudentResponse(BaseModel):
+    std_id: int
+    name: str
+    roll_number: str
+    std_class: int
+
+
 #  TEACHERS 
 
 class UpdateTeacher(BaseModel):
@@ -36,6 +44,18 @@ class UpdateTeacher(BaseModel):
     email: EmailStr
 
 
+class UserResponse(BaseModel):
+    user_id: int
+    name: str
+    email: str
+    role: str
+
+
+class TeacherResponse(BaseModel):
+    user_id: int
+    name: str
+
+
 #  ASSIGN STUDENTS
 
 class AssignStudent(BaseModel):
@@ -43,12 +63,25 @@ class AssignStudent(BaseModel):
     student_id: int
 
 
+class BulkAssignStudents(BaseModel):
+    teacher_id: int
+    student_ids: Optional[list[int]] = None
+    std_class: Optional[int] = None
+
+    @model_validator(mode="after")
+    def one_selection(self):
+        if (self.student_ids is None) == (self.std_class is None):
+            raise ValueError("Give either student_ids or std_class")
+        return self
+
+
 # ATTENDANCE 
 
 class MarkAttendance(BaseModel):
     student_id: int
     date: date
     status: bool
+    overwrite: bool = False  # replace the caller's own mark for the day instead of answering 400
 
 
 class UpdateAttendance(BaseModel):
@@ -57,8 +90,62 @@ class UpdateAttendance(BaseModel):
     status: bool
 
 
+class BulkAttendanceRecord(BaseModel):
+    student_id: int
+    status: bool
+
+
+class BulkMarkAttendance(BaseModel):
+    date: date
+    records: list[BulkAttendanceRecord]
+
+
 #  REPORTS 
 
+class AttendanceRecord(BaseModel):
+    id: int
+    student_id: int
+    date: date
+    status: bool
+    marked_by_teacher: int
+
+
+class AttendancePage(BaseModel):
+    items: list[AttendanceRecord]
+    next_cursor: Optional[str]
+
+
+class AttendanceChanges(BaseModel):
+    items: list[AttendanceRecord]
+    cursor: str
+    reset: bool
+    has_more: bool
+
+
+class DetailedAttendanceRecord(BaseModel):
+    id: int
+    student_id: int
+    student_name: str
+    std_class: int
+    date: date
+    status: bool
+    marked_by_teacher: int
+    teacher_name: str
+
+
+class DetailedAttendancePage(BaseModel):
+    items: list[DetailedAttendanceRecord]
+    next_cursor: Optional[str]
+
+
+class ReportFilters(BaseModel):
+    student_id: Optional[int] = None
+    std_class: Optional[int] = None
+    teacher_id: Optional[int] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
 class StudentWiseReport(BaseModel):
     student_id: int
     total_days: int
@@ -73,3 +160,12 @@ class MonthWiseReport(BaseModel):
     present: int
     absent: int
     present_percent: float
+
+
+class AbsenteeAlert(BaseModel):
+    student_id: int
+    last_date: date
+    window_days: int
+    window_present: int
+    present_ratio: float
+    absence_streak: int
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import (Column,Integer,String,Boolean,Date,
-                        ForeignKey,UniqueConstraint)
+from sqlalchemy import (Column,Integer,String,Boolean,Date,DateTime,
+                        ForeignKey,UniqueConstraint,Index)
 from database.db import engine
+from database.migrations import run_migrations
 
 Base = declarative_base()
 
@@ -14,6 +15,8 @@ class Users(Base):
     password = Column(String, nullable=False)
     role = Column(String, nullable=False)
 
+    __table_args__ = (Index("ix_users_role", "role"),)
+
 
 class Students(Base):
     __tablename__ = "students"
@@ -22,6 +25,8 @@ class Students(Base):
     roll_number = Column(String, unique=True, nullable=False)
     std_class = Column(Integer, nullable=False)
 
+    __table_args__ = (Index("ix_students_class", "std_class", "std_id"),)
+
 
 class TeacherStudentMap(Base):
     __tablename__ = "teacher_student_map"
@@ -29,7 +34,8 @@ class TeacherStudentMap(Base):
     teacher_id = Column(Integer,ForeignKey("users.user_id", ondelete="CASCADE"),nullable=False)
     student_id = Column(Integer,ForeignKey("students.std_id", ondelete="CASCADE"),nullable=False)
 
-    __table_args__ = (UniqueConstraint("teacher_id","student_id",name="unique_teacher_student"),)
+    __table_args__ = (UniqueConstraint("teacher_id","student_id",name="unique_teacher_student"),
+                      Index("ix_teacher_student_map_student", "student_id", "teacher_id"),)
 
 
 class Attendance(Base):
@@ -40,8 +46,54 @@ class Attendance(Base):
     date = Column(Date, nullable=False)
     status = Column(Boolean, nullable=False)
     marked_by_teacher = Column(Integer,ForeignKey("users.user_id", ondelete="CASCADE"),nullable=False)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")  # see services/changes.py
+
+    __table_args__ = ( UniqueConstraint("student_id","date",name="unique_student_date"),
+                       Index("ix_attendance_date_student_status", "date", "student_id", "status"),
+                       Index("ix_attendance_marked_by_teacher", "marked_by_teacher"),
+                       Index("ix_attendance_change_seq", "change_seq"),)
+
+
+class StudentAttendanceSummary(Base):
+    __tablename__ = "student_attendance_summary"
+    student_id = Column(Integer,ForeignKey("students.std_id", ondelete="CASCADE"),primary_key=True)
+    total_days = Column(Integer, nullable=False, default=0)
+    present_days = Column(Integer, nullable=False, default=0)
+
+
+class MonthAttendanceSummary(Base):
+    __tablename__ = "month_attendance_summary"
+    month = Column(String, primary_key=True)
+    total_days = Column(Integer, nullable=False, default=0)
+    present_days = Column(Integer, nullable=False, default=0)
+
+
+class AttendanceBitmap(Base):
+    __tablename__ = "attendance_bitmap"
+    student_id = Column(Integer,ForeignKey("students.std_id", ondelete="CASCADE"),primary_key=True)
+    month = Column(String, primary_key=True)
+    marked = Column(Integer, nullable=False, default=0)   # bit d-1 set: day d has attendance
+    present = Column(Integer, nullable=False, default=0)  # bit d-1 set: present on day d
+
+
+class AttendanceAlert(Base):
+    __tablename__ = "attendance_alert"
+    student_id = Column(Integer,ForeignKey("students.std_id", ondelete="CASCADE"),primary_key=True)
+    last_date = Column(Date, nullable=False)             # latest attendance mark; the window ends here
+    window_days = Column(Integer, nullable=False)        # marks in the rolling window
+    window_present = Column(Integer, nullable=False)
+    absence_streak = Column(Integer, nullable=False)     # consecutive absences up to last_date
+    flagged = Column(Boolean, nullable=False)
+
+    __table_args__ = (Index("ix_attendance_alert_flagged", "flagged", "student_id"),)
+
 
-    __table_args__ = ( UniqueConstraint("student_id","date",name="unique_student_date"),)
+class TableVersion(Base):
+    __tablename__ = "table_version"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)  # UTC
 
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
@@ -0,0 +1,99 @@
+from datetime import date
+from typing import Union
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.async_content import (fetch_assigned_students,attendance_report,attendance_report_page,stream_attendance_report,
+                                    get_all_users,get_all_students,get_teachers,student_wise_report,month_wise_report,
+                                    enriched_attendance_report,list_validators,absentee_alerts,attendance_changes)
+from models.schema import (ReportFilters,StudentResponse,UserResponse,TeacherResponse,AttendanceRecord,AttendancePage,
+                           AttendanceChanges,DetailedAttendancePage,StudentWiseReport,MonthWiseReport,AbsenteeAlert)
+from database.db import AsyncSessionLocal
+from auths.auth import decode_token
+from services import report_cache
+from services.versions import not_modified,USERS,STUDENTS,ASSIGNMENTS
+
+read_router = APIRouter()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def report_filters(student_id: int = None,std_class: int = None,teacher_id: int = None,
+                         date_from: date = None,date_to: date = None):
+    # ReportFilters = Depends() would be built in the threadpool; an async dependency stays on the event loop.
+    return ReportFilters(student_id=student_id,std_class=std_class,teacher_id=teacher_id,date_from=date_from,date_to=date_to)
+
+
+@read_router.get("/admin/students", response_model=list[StudentResponse])
+async def view_students(request: Request,response: Response,db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    if token_data.role == "admin" and (cached := not_modified(request, response, *await list_validators(db, [STUDENTS]))):
+        return cached
+    return await get_all_students(token_data, db)
+
+
+@read_router.get("/admin/users", response_model=list[UserResponse])
+async def view_users(request: Request,response: Response,db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    if token_data.role == "admin" and (cached := not_modified(request, response, *await list_validators(db, [USERS]))):
+        return cached
+    return await get_all_users(token_data, db)
+
+
+@read_router.get("/teachers", response_model=list[TeacherResponse])
+async def list_teachers(request: Request,response: Response,db: AsyncSession = Depends(get_async_db)):
+    if cached := not_modified(request, response, *await list_validators(db, [USERS])):
+        return cached
+    return await get_teachers(db)
+
+
+@read_router.get("/teacher/students", response_model=list[StudentResponse])
+async def my_students(request: Request,response: Response,db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    if token_data.role == "teacher" and (cached := not_modified(
+            request, response, *await list_validators(db, [STUDENTS, ASSIGNMENTS], f"teacher:{token_data.user_id}"))):
+        return cached
+    return await fetch_assigned_students(token_data, db)
+
+
+@read_router.get("/attendance/report", response_model=Union[list[AttendanceRecord], AttendancePage])
+async def report(filters: ReportFilters = Depends(report_filters),cursor: str = None,limit: int = None,stream: bool = False,
+                 db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    if stream:
+        return StreamingResponse(stream_attendance_report(token_data, filters), media_type="application/x-ndjson")
+    key, cached = await report_cache.alookup(token_data, "attendance", cursor=cursor, limit=limit, **filters.model_dump())
+    if cached:
+        return cached
+    if cursor or limit:
+        return await report_cache.astore(key, await attendance_report_page(token_data, db, cursor, limit, filters),
+                                         AttendancePage)
+    return await report_cache.astore(key, await attendance_report(token_data, db, filters), list[AttendanceRecord])
+
+
+@read_router.get("/attendance/changes", response_model=AttendanceChanges)
+async def changes(since: str = None,limit: int = None,db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    return await attendance_changes(token_data, db, since, limit)
+
+
+@read_router.get("/attendance/report/detailed", response_model=DetailedAttendancePage)
+async def detailed_report(filters: ReportFilters = Depends(report_filters),cursor: str = None,limit: int = None,
+                          db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    return await enriched_attendance_report(token_data, filters, db, cursor, limit)
+
+
+@read_router.get("/admin/report/student-wise", response_model=list[StudentWiseReport])
+async def student_report(filters: ReportFilters = Depends(report_filters),db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    key, cached = await report_cache.alookup(token_data, "student-wise", **filters.model_dump())
+    return cached or await report_cache.astore(key, await student_wise_report(token_data, db, filters),
+                                                    list[StudentWiseReport])
+
+
+@read_router.get("/admin/report/month-wise", response_model=list[MonthWiseReport])
+async def monthly_report(filters: ReportFilters = Depends(report_filters),db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    key, cached = await report_cache.alookup(token_data, "month-wise", **filters.model_dump())
+    return cached or await report_cache.astore(key, await month_wise_report(token_data, db, filters), list[MonthWiseReport])
+
+
+@read_router.get("/admin/alerts/absentees", response_model=list[AbsenteeAlert])
+async def absentees(db: AsyncSession = Depends(get_async_db),token_data=Depends(decode_token)):
+    return await absentee_alerts(token_data, db)
@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends
+from typing import Union
+from fastapi import APIRouter, Depends, UploadFile, Request, Response
+from fastapi.responses import StreamingResponse,PlainTextResponse
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
 from services.content import (register_user,login_user,create_student,assign_student,fetch_assigned_students,unassign_student,mark_attendance,attendance_report,update_attendance,
+                              bulk_mark_attendance,attendance_report_page,stream_attendance_report,enriched_attendance_report,
                               get_all_users,get_all_students,get_teachers,update_student,delete_student,update_teacher,delete_teacher,
-                              student_wise_report,month_wise_report)
-from models.schema import (CreateUsers,CreateStudents,Login,AssignStudent,MarkAttendance,UpdateAttendance,
-                           UpdateStudent,UpdateTeacher)
+                              student_wise_report,month_wise_report,absentee_alerts,attendance_changes,
+                              bulk_assign_students,bulk_unassign_students)
+from models.schema import (CreateUsers,CreateStudents,Login,AssignStudent,BulkAssignStudents,MarkAttendance,UpdateAttendance,BulkMarkAttendance,
+                           UpdateStudent,UpdateTeacher,ReportFilters,StudentResponse,UserResponse,TeacherResponse,
+                           AttendanceRecord,AttendancePage,AttendanceChanges,DetailedAttendancePage,StudentWiseReport,MonthWiseReport,AbsenteeAlert)
 from database.db import SessionLocal
 from auths.auth import decode_token
+from services.export import export_attendance
+from services.roster_import import import_roster_upload
+from services.metrics import Histogram,render_metrics
+from services import report_cache
+from services.versions import list_validators,not_modified,USERS,STUDENTS,ASSIGNMENTS
 
 router = APIRouter()
+# List and report reads; main.py swaps in routes.async_route when DB_ASYNC is on.
+read_router = APIRouter()
 auth = OAuth2PasswordBearer(tokenUrl="login")
 
+LOGIN_LATENCY = Histogram("login_duration_seconds", "Latency of /login including password verification")
+
 
 def get_db():
     db = SessionLocal()
@@ -29,7 +43,13 @@ def register(data: CreateUsers, db: Session = Depends(get_db)):
 
 @router.post("/login")
 def login(data: Login, db: Session = Depends(get_db)):
-    return login_user(data.email, data.password, db)
+    with LOGIN_LATENCY.time():
+        return login_user(data.email, data.password, db)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_metrics()
 
 
 #  ADMIN : STUDENTS 
@@ -39,6 +59,11 @@ def add_student(data: CreateStudents,db: Session = Depends(get_db),token_data=De
     return create_student(data, token_data, db)
 
 
+@router.post("/admin/students/import")
+def import_students(file: UploadFile,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return import_roster_upload(token_data, file, db)
+
+
 @router.put("/admin/student/{std_id}")
 def edit_student(std_id: int,data: UpdateStudent,db: Session = Depends(get_db),token_data=Depends(decode_token)):
     return update_student(std_id, data, token_data, db)
@@ -49,15 +74,19 @@ def remove_student(std_id: int,db: Session = Depends(get_db),token_data=Depends(
     return delete_student(std_id, token_data, db)
 
 
-@router.get("/admin/students")
-def view_students(db: Session = Depends(get_db),token_data=Depends(decode_token)):
+@read_router.get("/admin/students", response_model=list[StudentResponse])
+def view_students(request: Request,response: Response,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    if token_data.role == "admin" and (cached := not_modified(request, response, *list_validators(db, [STUDENTS]))):
+        return cached
     return get_all_students(token_data, db)
 
 
 #  ADMIN : TEACHERS 
 
-@router.get("/admin/users")
-def view_users(db: Session = Depends(get_db),token_data=Depends(decode_token)):
+@read_router.get("/admin/users", response_model=list[UserResponse])
+def view_users(request: Request,response: Response,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    if token_data.role == "admin" and (cached := not_modified(request, response, *list_validators(db, [USERS]))):
+        return cached
     return get_all_users(token_data, db)
 
 
@@ -71,8 +100,10 @@ def remove_teacher(user_id: int,db: Session = Depends(get_db),token_data=Depends
     return delete_teacher(user_id, token_data, db)
 
 
-@router.get("/teachers")
-def list_teachers(db: Session = Depends(get_db)):
+@read_router.get("/teachers", response_model=list[TeacherResponse])
+def list_teachers(request: Request,response: Response,db: Session = Depends(get_db)):
+    if cached := not_modified(request, response, *list_validators(db, [USERS])):
+        return cached
     return get_teachers(db)
 
 
@@ -87,10 +118,23 @@ def unassign(teacher_id: int,student_id: int,db: Session = Depends(get_db),token
     return unassign_student(teacher_id, student_id, token_data, db)
 
 
+@router.post("/admin/assign/bulk")
+def bulk_assign(data: BulkAssignStudents,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return bulk_assign_students(data, token_data, db)
+
+
+@router.post("/admin/unassign/bulk")
+def bulk_unassign(data: BulkAssignStudents,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return bulk_unassign_students(data, token_data, db)
+
+
 # TEACHER 
 
-@router.get("/teacher/students")
-def my_students(db: Session = Depends(get_db),token_data=Depends(decode_token)):
+@read_router.get("/teacher/students", response_model=list[StudentResponse])
+def my_students(request: Request,response: Response,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    if token_data.role == "teacher" and (cached := not_modified(
+            request, response, *list_validators(db, [STUDENTS, ASSIGNMENTS], f"teacher:{token_data.user_id}"))):
+        return cached
     return fetch_assigned_students(token_data, db)
 
 
@@ -99,6 +143,11 @@ def attendance(data: MarkAttendance,db: Session = Depends(get_db),token_data=Dep
     return mark_attendance(db, data, token_data)
 
 
+@router.post("/teacher/attendance/bulk")
+def bulk_attendance(data: BulkMarkAttendance,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return bulk_mark_attendance(db, data, token_data)
+
+
 @router.put("/teacher/attendance")
 def update_attendance_route(data: UpdateAttendance,db: Session = Depends(get_db),token_data=Depends(decode_token)):
     return update_attendance(data, token_data, db)
@@ -106,19 +155,54 @@ def update_attendance_route(data: UpdateAttendance,db: Session = Depends(get_db)
 
 #  REPORTS 
 
-@router.get("/attendance/report")
-def report(db: Session = Depends(get_db),token_data=Depends(decode_token)):
-    return attendance_report(token_data, db)
+@read_router.get("/attendance/report", response_model=Union[list[AttendanceRecord], AttendancePage])
+def report(filters: ReportFilters = Depends(),cursor: str = None,limit: int = None,stream: bool = False,
+           db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    if stream:
+        return StreamingResponse(stream_attendance_report(token_data, filters), media_type="application/x-ndjson")
+    key, cached = report_cache.lookup(token_data, "attendance", cursor=cursor, limit=limit, **filters.model_dump())
+    if cached:
+        return cached
+    if cursor or limit:
+        return report_cache.store(key, attendance_report_page(token_data, db, cursor, limit, filters),
+                                  AttendancePage)
+    return report_cache.store(key, attendance_report(token_data, db, filters), list[AttendanceRecord])
+
+
+@read_router.get("/attendance/changes", response_model=AttendanceChanges)
+def changes(since: str = None,limit: int = None,db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return attendance_changes(token_data, db, since, limit)
+
+
+@read_router.get("/attendance/report/detailed", response_model=DetailedAttendancePage)
+def detailed_report(filters: ReportFilters = Depends(),cursor: str = None,limit: int = None,
+                    db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return enriched_attendance_report(token_data, filters, db, cursor, limit)
+
+
+@read_router.get("/admin/report/student-wise", response_model=list[StudentWiseReport])
+def student_report(filters: ReportFilters = Depends(),db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    key, cached = report_cache.lookup(token_data, "student-wise", **filters.model_dump())
+    return cached or report_cache.store(key, student_wise_report(token_data, db, filters),
+                                             list[StudentWiseReport])
+
+
+@read_router.get("/admin/report/month-wise", response_model=list[MonthWiseReport])
+def monthly_report(filters: ReportFilters = Depends(),db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    key, cached = report_cache.lookup(token_data, "month-wise", **filters.model_dump())
+    return cached or report_cache.store(key, month_wise_report(token_data, db, filters), list[MonthWiseReport])
 
 
-@router.get("/admin/report/student-wise")
-def student_report(db: Session = Depends(get_db),token_data=Depends(decode_token)):
-    return student_wise_report(token_data, db)
+@read_router.get("/admin/alerts/absentees", response_model=list[AbsenteeAlert])
+def absentees(db: Session = Depends(get_db),token_data=Depends(decode_token)):
+    return absentee_alerts(token_data, db)
 
 
-@router.get("/admin/report/month-wise")
-def monthly_report(db: Session = Depends(get_db),token_data=Depends(decode_token)):
-    return month_wise_report(token_data, db)
+@router.get("/admin/export/attendance")
+def export(filters: ReportFilters = Depends(),format: str = "csv",token_data=Depends(decode_token)):
+    rows, media_type = export_attendance(token_data, filters, format)
+    return StreamingResponse(rows, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="attendance.{format}"'})
 
 
 @router.put("/admin/attendance")
@@ -0,0 +1,145 @@
+import os
+import sys
+from datetime import timedelta
+from itertools import groupby
+from sqlalchemy import select, insert, delete, func, or_
+from sqlalchemy.orm import Session
+from database.db import SessionLocal, DIALECT_INSERT
+from models.table_schema import Attendance, AttendanceAlert
+
+# Chronic-absence index: one row per student with the presence counts of the
+# rolling window ending at their latest mark and their current run of
+# consecutive absences. Attendance writes call refresh_alerts() for the
+# students they touched, which re-reads only those students' most recent
+# marks; /admin/alerts/absentees then reads the flagged rows through an index.
+# Changing the thresholds needs a rebuild:
+#
+#   python -m services.alerts rebuild|verify
+
+ALERT_WINDOW_DAYS = int(os.getenv("ALERT_WINDOW_DAYS", "30"))
+ALERT_MIN_RATIO = float(os.getenv("ALERT_MIN_RATIO", "0.75"))
+ALERT_MIN_DAYS = int(os.getenv("ALERT_MIN_DAYS", "5"))  # marks needed before the ratio counts
+ALERT_STREAK = int(os.getenv("ALERT_STREAK", "3"))
+
+
+def _state(student_id, recent, older_absences=0):
+    """recent: (date, status) newest first, at least the whole window."""
+    last_date = recent[0].date
+    window = [r for r in recent if r.date > last_date - timedelta(days=ALERT_WINDOW_DAYS)]
+    present = sum(1 for r in window if r.status)
+    streak = next((i for i, r in enumerate(recent) if r.status), len(recent) + older_absences)
+    flagged = streak >= ALERT_STREAK or (len(window) >= ALERT_MIN_DAYS and present < ALERT_MIN_RATIO * len(window))
+    return {"student_id": student_id, "last_date": last_date, "window_days": len(window),
+            "window_present": present, "absence_streak": streak, "flagged": flagged}
+
+
+def _windows_stmt(student_ids):
+    # Dates are unique per student, so the window holds at most ALERT_WINDOW_DAYS marks.
+    rank = func.row_number().over(partition_by=Attendance.student_id, order_by=Attendance.date.desc())
+    ranked = select(Attendance.student_id, Attendance.date, Attendance.status, rank.label("rank")) \
+        .where(Attendance.student_id.in_(student_ids)).subquery()
+    return select(ranked.c.student_id, ranked.c.date, ranked.c.status) \
+        .where(ranked.c.rank <= ALERT_WINDOW_DAYS) \
+        .order_by(ranked.c.student_id, ranked.c.date.desc())
+
+
+def _streaks_stmt(student_ids):
+    # Length of each student's whole current absence run: marks after their last present day.
+    last_present = select(Attendance.student_id, func.max(Attendance.date).label("date")) \
+        .where(Attendance.student_id.in_(student_ids), Attendance.status == True) \
+        .group_by(Attendance.student_id).subquery()
+    return select(Attendance.student_id, func.count(Attendance.id)) \
+        .outerjoin(last_present, last_present.c.student_id == Attendance.student_id) \
+        .where(Attendance.student_id.in_(student_ids),
+               or_(last_present.c.date.is_(None), Attendance.date > last_present.c.date)) \
+        .group_by(Attendance.student_id)
+
+
+def _student_states(db: Session, student_ids):
+    windows = {student_id: list(marks) for student_id, marks in
+               groupby(db.execute(_windows_stmt(student_ids)), key=lambda r: r.student_id)}
+    # Absent for the whole window: the run may continue further back.
+    absent = [s for s, recent in windows.items()
+              if len(recent) == ALERT_WINDOW_DAYS and not any(r.status for r in recent)]
+    streaks = dict(db.execute(_streaks_stmt(absent)).all()) if absent else {}
+    return {s: _state(s, recent, streaks.get(s, len(recent)) - len(recent)) for s, recent in windows.items()}
+
+
+def _upsert(db: Session, rows):
+    table = AttendanceAlert.__table__
+    stmt = DIALECT_INSERT[db.get_bind().dialect.name](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id"],
+        set_={c: stmt.excluded[c] for c in ("last_date", "window_days", "window_present", "absence_streak", "flagged")})
+    db.execute(stmt, rows)
+
+
+def refresh_alerts(db: Session, student_ids):
+    """Recompute the alert rows of students whose attendance changed in this transaction."""
+    db.flush()  # sessions run with autoflush off; the reads below must see this transaction's writes
+    student_ids = sorted(set(student_ids))
+    if not student_ids:
+        return
+    states = _student_states(db, student_ids)
+    rows = [states[s] for s in student_ids if s in states]
+    gone = [s for s in student_ids if s not in states]
+    if rows:
+        _upsert(db, rows)
+    if gone:
+        db.execute(delete(AttendanceAlert).where(AttendanceAlert.student_id.in_(gone)))
+
+
+def remove_student_alert(db: Session, student_id: int):
+    db.execute(delete(AttendanceAlert).where(AttendanceAlert.student_id == student_id))
+
+
+def flagged_stmt():
+    return select(AttendanceAlert.student_id, AttendanceAlert.last_date, AttendanceAlert.window_days,
+                  AttendanceAlert.window_present, AttendanceAlert.absence_streak) \
+        .where(AttendanceAlert.flagged == True) \
+        .order_by(AttendanceAlert.absence_streak.desc(), AttendanceAlert.student_id)
+
+
+def _computed(db: Session):
+    rows = db.execute(select(Attendance.student_id, Attendance.date, Attendance.status)
+                      .order_by(Attendance.student_id, Attendance.date.desc()))
+    return {student_id: _state(student_id, list(marks))
+            for student_id, marks in groupby(rows, key=lambda r: r.student_id)}
+
+
+def rebuild_alerts(db: Session):
+    states = _computed(db)
+    db.execute(delete(AttendanceAlert))
+    if states:
+        db.execute(insert(AttendanceAlert), list(states.values()))
+    db.commit()
+    return {"students": len(states), "flagged": sum(s["flagged"] for s in states.values())}
+
+
+def verify_alerts(db: Session):
+    expected = _computed(db)
+    stored = {r.student_id: dict(r._mapping) for r in db.execute(
+        select(AttendanceAlert.student_id, AttendanceAlert.last_date, AttendanceAlert.window_days,
+               AttendanceAlert.window_present, AttendanceAlert.absence_streak, AttendanceAlert.flagged))}
+    return [{"student_id": k, "expected": expected.get(k), "stored": stored.get(k)}
+            for k in expected.keys() | stored.keys() if expected.get(k) != stored.get(k)]
+
+
+def backfill_alerts(db: Session):
+    if db.query(AttendanceAlert).first() is None and db.query(Attendance).first() is not None:
+        rebuild_alerts(db)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    with SessionLocal() as session:
+        if command == "rebuild":
+            print(rebuild_alerts(session))
+        elif command == "verify":
+            problems = verify_alerts(session)
+            for p in problems:
+                print(p)
+            print("OK" if not problems else f"{len(problems)} mismatches")
+            sys.exit(1 if problems else 0)
+        else:
+            sys.exit("usage: python -m services.alerts [rebuild|verify]")
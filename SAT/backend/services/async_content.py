@@ -0,0 +1,111 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+import json
+from database.db import AsyncSessionLocal
+from services.content import (_students_stmt,_users_stmt,_teachers_stmt,_assigned_students_stmt,_attendance_report_stmt,
+                              _attendance_rows_stmt,_attendance_dict,_attendance_page_stmt,_attendance_page,
+                              _keyset_page,_enriched_report_stmt,
+                              _student_report_stmt,_student_report_dict,_month_report_stmt,_month_report_dict,
+                              _date_bounds,_student_range_stmt,_student_range_report,_all_time,_student_bitmap_stmt,
+                              _month_range_stmt,_month_range_report,_alert_dict,_changes_limit,_change_counters_stmt,
+                              _changes_start,_changes_stmt,_changes_page,NO_FILTERS,REPORT_PAGE_SIZE,REPORT_STREAM_CHUNK)
+from services import bitmap, roster_cache
+from services.alerts import flagged_stmt
+from services.versions import versions_stmt,validators
+from services.changes import ATTENDANCE
+
+# AsyncSession versions of the list and report reads in content.py. They share
+# the statement builders and row formatting, so only the I/O differs.
+
+
+async def list_validators(db: AsyncSession, names, scope=""):
+    return validators((await db.execute(versions_stmt(names))).all(), scope)
+
+
+async def get_all_students(token_data, db: AsyncSession):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin can view students")
+
+    return (await db.execute(_students_stmt())).all()
+
+
+async def get_all_users(token_data, db: AsyncSession):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin can view users")
+    return (await db.execute(_users_stmt())).all()
+
+
+async def get_teachers(db: AsyncSession):
+    return (await db.execute(_teachers_stmt())).all()
+
+
+async def fetch_assigned_students(token_data, db: AsyncSession):
+    if token_data.role != "teacher":
+        raise HTTPException(403, "Only teacher can view students")
+
+    student_ids = await db.run_sync(roster_cache.roster, token_data.user_id)
+    return (await db.execute(_assigned_students_stmt(student_ids))).all()
+
+
+async def attendance_report(token_data, db: AsyncSession, filters=NO_FILTERS):
+    return (await db.execute(_attendance_report_stmt(token_data, filters))).all()
+
+
+async def attendance_report_page(token_data, db: AsyncSession, cursor: str = None, limit: int = None, filters=NO_FILTERS):
+    limit = limit or REPORT_PAGE_SIZE
+    rows = (await db.execute(_attendance_page_stmt(token_data, cursor, limit, filters))).all()
+    return _attendance_page(rows, limit)
+
+
+async def enriched_attendance_report(token_data, filters, db: AsyncSession, cursor: str = None, limit: int = None):
+    limit = limit or REPORT_PAGE_SIZE
+    rows = (await db.execute(_keyset_page(_enriched_report_stmt(token_data, filters), cursor, limit))).all()
+    return _attendance_page(rows, limit)
+
+
+async def stream_attendance_report(token_data, filters=NO_FILTERS):
+    async with AsyncSessionLocal() as db:
+        rows = await db.stream(_attendance_rows_stmt(token_data, filters).execution_options(yield_per=REPORT_STREAM_CHUNK))
+        async for r in rows:
+            yield json.dumps(_attendance_dict(r)) + "\n"
+
+
+async def attendance_changes(token_data, db: AsyncSession, since: str = None, limit: int = None):
+    limit = _changes_limit(limit)
+    counters = dict((await db.execute(_change_counters_stmt())).all())
+    after, reset, scope = _changes_start(token_data, counters, since)
+    rows = (await db.execute(_changes_stmt(token_data, after, limit))).all() if counters.get(ATTENDANCE, 0) > after else []
+    return _changes_page(rows, limit, counters, after, reset, scope)
+
+
+async def student_wise_report(token_data, db: AsyncSession, filters=NO_FILTERS):
+    if token_data.role not in ("admin", "teacher"):
+        raise HTTPException(403, "Only admin or teacher")
+
+    if _all_time(filters):
+        result = (await db.execute(_student_report_stmt(token_data, filters))).all()
+    elif bitmap.ATTENDANCE_BITMAPS and filters.teacher_id is None:
+        date_from, date_to = _date_bounds(filters.date_from, filters.date_to)
+        rows = await db.scalars(_student_bitmap_stmt(token_data, filters))
+        return _student_range_report(bitmap.range_counts(rows, date_from, date_to))
+    else:
+        result = (await db.execute(_student_range_stmt(token_data, filters))).all()
+    return [_student_report_dict(r) for r in result]
+
+
+async def month_wise_report(token_data, db: AsyncSession, filters=NO_FILTERS):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin")
+
+    if filters == NO_FILTERS:
+        result = (await db.execute(_month_report_stmt())).all()
+    else:
+        result = _month_range_report(await db.execute(_month_range_stmt(token_data, filters)))
+    return [_month_report_dict(r) for r in result]
+
+
+async def absentee_alerts(token_data, db: AsyncSession):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin")
+
+    return [_alert_dict(r) for r in await db.execute(flagged_stmt())]
@@ -0,0 +1,156 @@
+import os
+import sys
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from sqlalchemy import select, update, delete, bindparam
+from sqlalchemy.orm import Session
+from database.db import SessionLocal, DIALECT_INSERT
+from models.table_schema import Attendance, AttendanceBitmap, TableVersion
+from services import summary
+
+# Optional packed presence store: one row per student per month holding two
+# 31-bit masks, "marked" (attendance taken that day) and "present". Counts
+# over any date range are popcounts of the masked words, so range reports
+# read O(students x months) small rows instead of O(days) attendance rows.
+# The attendance table stays the source of truth (ids, marking teacher);
+# bitmaps are maintained from apply_attendance_changes() in the same
+# transaction and can be rebuilt at any time:
+#
+#   python -m services.bitmap rebuild|verify
+#
+# Writes skip the bitmaps while the flag is off, so an "attendance_bitmap" row
+# in table_version records that they were kept up to date. Starting with the
+# flag off removes it, and starting with the flag on rebuilds when it is missing.
+
+ATTENDANCE_BITMAPS = os.getenv("ATTENDANCE_BITMAPS", "false").lower() == "true"
+MAINTAINED = "attendance_bitmap"
+
+
+def _bit(day):
+    return 1 << (day.day - 1)
+
+
+def apply_bitmap_changes(db: Session, changes):
+    """changes: (student_id, date, total_delta, present_delta) as in summary.apply_attendance_changes."""
+    masks = defaultdict(lambda: {"set_marked": 0, "set_present": 0, "clear_marked": 0, "clear_present": 0})
+    for student_id, day, total, present in changes:
+        m, bit = masks[(student_id, summary.month_key(day))], _bit(day)
+        if total > 0:
+            m["set_marked"] |= bit
+            if present > 0:
+                m["set_present"] |= bit
+        elif total < 0:
+            m["clear_marked"] |= bit
+            m["clear_present"] |= bit
+        elif present > 0:
+            m["set_present"] |= bit
+        elif present < 0:
+            m["clear_present"] |= bit
+
+    clears = [{"sid": k[0], "mon": k[1], "cm": m["clear_marked"], "cp": m["clear_present"]}
+              for k, m in masks.items() if m["clear_marked"] or m["clear_present"]]
+    if clears:
+        # x - (x & mask) clears the bits without needing a bitwise NOT operator.
+        table = AttendanceBitmap.__table__
+        db.execute(update(table)
+                   .where(table.c.student_id == bindparam("sid"), table.c.month == bindparam("mon"))
+                   .values(marked=table.c.marked - table.c.marked.op("&")(bindparam("cm")),
+                           present=table.c.present - table.c.present.op("&")(bindparam("cp"))),
+                   clears)
+
+    sets = [{"student_id": k[0], "month": k[1], "marked": m["set_marked"], "present": m["set_present"]}
+            for k, m in masks.items() if m["set_marked"] or m["set_present"]]
+    if sets:
+        table = AttendanceBitmap.__table__
+        stmt = DIALECT_INSERT[db.get_bind().dialect.name](table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "month"],
+            set_={"marked": table.c.marked.op("|")(stmt.excluded.marked),
+                  "present": table.c.present.op("|")(stmt.excluded.present)})
+        db.execute(stmt, sets)
+
+
+def remove_student_bitmaps(db: Session, student_id: int):
+    db.execute(delete(AttendanceBitmap).where(AttendanceBitmap.student_id == student_id))
+
+
+def _range_mask(month: str, date_from: date, date_to: date):
+    year, mon = map(int, month.split("-"))
+    first = date_from.day if (date_from.year, date_from.month) == (year, mon) else 1
+    last = date_to.day if (date_to.year, date_to.month) == (year, mon) else monthrange(year, mon)[1]
+    if first > last:
+        return 0
+    return ((1 << last) - 1) ^ ((1 << (first - 1)) - 1)
+
+
+def range_stmt(date_from: date, date_to: date):
+    return select(AttendanceBitmap).where(AttendanceBitmap.month >= summary.month_key(date_from),
+                                          AttendanceBitmap.month <= summary.month_key(date_to)) \
+        .order_by(AttendanceBitmap.student_id)
+
+
+def range_counts(rows, date_from: date, date_to: date):
+    """Fold range_stmt() rows into {student_id: (total_days, present_days)} for [date_from, date_to]."""
+    counts = defaultdict(lambda: [0, 0])
+    if date_from > date_to:
+        return {}
+    for row in rows:
+        mask = _range_mask(row.month, date_from, date_to)
+        counts[row.student_id][0] += (row.marked & mask).bit_count()
+        counts[row.student_id][1] += (row.present & mask).bit_count()
+    return {k: tuple(v) for k, v in counts.items() if v[0]}
+
+
+def _computed(db: Session):
+    words = defaultdict(lambda: [0, 0])
+    for r in db.execute(select(Attendance.student_id, Attendance.date, Attendance.status)):
+        word = words[(r.student_id, summary.month_key(r.date))]
+        word[0] |= _bit(r.date)
+        if r.status:
+            word[1] |= _bit(r.date)
+    return {k: tuple(v) for k, v in words.items()}
+
+
+def rebuild_bitmaps(db: Session):
+    words = _computed(db)
+    db.execute(delete(AttendanceBitmap))
+    db.add_all(AttendanceBitmap(student_id=sid, month=mon, marked=m, present=p) for (sid, mon), (m, p) in words.items())
+    db.commit()
+    return {"rows": len(words)}
+
+
+def verify_bitmaps(db: Session):
+    expected = _computed(db)
+    stored = {(r.student_id, r.month): (r.marked, r.present) for r in db.scalars(select(AttendanceBitmap))
+              if r.marked}
+    return [{"key": k, "expected": expected.get(k), "stored": stored.get(k)}
+            for k in expected.keys() | stored.keys() if expected.get(k) != stored.get(k)]
+
+
+def backfill_bitmaps(db: Session):
+    if not ATTENDANCE_BITMAPS:
+        db.execute(delete(TableVersion).where(TableVersion.name == MAINTAINED))
+        db.commit()
+    elif db.get(TableVersion, MAINTAINED) is None:
+        rebuild_bitmaps(db)
+        # Workers starting together may all rebuild; the first marker wins.
+        db.execute(DIALECT_INSERT[db.get_bind().dialect.name](TableVersion.__table__).values(
+            name=MAINTAINED, version=1, updated_at=datetime.now(timezone.utc).replace(tzinfo=None))
+            .on_conflict_do_nothing(index_elements=["name"]))
+        db.commit()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    with SessionLocal() as session:
+        if command == "rebuild":
+            print(rebuild_bitmaps(session))
+        elif command == "verify":
+            problems = verify_bitmaps(session)
+            for p in problems:
+                print(p)
+            print("OK" if not problems else f"{len(problems)} mismatches")
+            sys.exit(1 if problems else 0)
+        else:
+            sys.exit("usage: python -m services.bitmap [rebuild|verify]")
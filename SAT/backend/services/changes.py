@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from database.db import DIALECT_INSERT
+from models.table_schema import Attendance, TableVersion
+
+# Change feed behind /attendance/changes. Every attendance row carries the
+# change_seq of its latest mark or update, taken from the "attendance"
+# counter in table_version inside the writing transaction. The counter row
+# stays locked until that transaction ends, so sequence numbers become
+# visible in order and a client that has read up to N never misses a later
+# commit below N. Removals (deleting a student or teacher) cannot be sent as
+# rows; they store their sequence under "attendance_removed", and a client
+# whose cursor predates it is told to start over.
+
+ATTENDANCE = "attendance"
+ATTENDANCE_REMOVED = "attendance_removed"
+
+
+def _upsert_counter(db: Session, name: str, initial: int, version):
+    """Create the counter at initial or set it to version; returns the stored value."""
+    table = TableVersion.__table__
+    stmt = DIALECT_INSERT[db.get_bind().dialect.name](table).values(
+        name=name, version=initial, updated_at=datetime.now(timezone.utc).replace(tzinfo=None))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"], set_={"version": version, "updated_at": stmt.excluded.updated_at})
+    return db.scalar(stmt.returning(table.c.version))
+
+
+def next_change_seqs(db: Session, count: int = 1):
+    """Reserve count consecutive change sequence numbers for this transaction."""
+    last = _upsert_counter(db, ATTENDANCE, count, TableVersion.__table__.c.version + count)
+    return range(last - count + 1, last + 1)
+
+
+def release_change_seqs(db: Session, count: int):
+    """Hand back the last count numbers this transaction reserved when they went unused.
+
+    The counter row stays locked until the transaction ends, so nobody else
+    can have reserved a number after them.
+    """
+    _upsert_counter(db, ATTENDANCE, 0, TableVersion.__table__.c.version - count)
+
+
+def record_removal(db: Session):
+    seq = next_change_seqs(db)[0]
+    _upsert_counter(db, ATTENDANCE_REMOVED, seq, seq)
+
+
+def backfill_changes(db: Session):
+    # Rows written before the column existed, or inserted in bulk by the seeder,
+    # start at 0. Numbering them by id keeps it to one statement; gaps are harmless.
+    top = db.scalar(select(func.max(Attendance.id)).where(Attendance.change_seq == 0))
+    if top is not None:
+        base = next_change_seqs(db, top).start - 1
+        db.execute(update(Attendance).where(Attendance.change_seq == 0).values(change_seq=Attendance.id + base))
+        db.commit()
@@ -1,9 +1,22 @@
 from sqlalchemy.orm import Session
-from models.table_schema import Users,Students,Attendance,TeacherStudentMap
-from passlib.hash import argon2
+from database.db import SessionLocal, DIALECT_INSERT
+from models.table_schema import (Users,Students,Attendance,TeacherStudentMap,StudentAttendanceSummary,MonthAttendanceSummary,
+                                 AttendanceBitmap,TableVersion)
+from services.summary import apply_attendance_changes,remove_student_summary,remove_teacher_summary,month_key
+from services import bitmap, report_cache, roster_cache, write_queue
+from services.alerts import refresh_alerts,remove_student_alert,flagged_stmt
+from services.versions import bump_versions,USERS,STUDENTS,ASSIGNMENTS
+from services.changes import next_change_seqs,release_change_seqs,record_removal,ATTENDANCE,ATTENDANCE_REMOVED
+from auths.hashing import hash_password,verify_password
 from auths.auth import create_access_token
 from fastapi import HTTPException
-from sqlalchemy import func
+from sqlalchemy import select,insert,update,delete,or_,and_,func,case,literal
+from datetime import date
+from types import SimpleNamespace
+import json
+from sqlalchemy.exc import IntegrityError
+from collections import defaultdict
+from models.schema import ReportFilters
 
 
 def register_user(data, db):
@@ -11,8 +24,9 @@ def register_user(data, db):
     if existing_user:
         raise HTTPException(status_code=400,detail="User already exists. Please login.")
     user = Users(name=data.name,email=data.email,
-                password=argon2.hash(data.password),role=data.role)
+                password=hash_password(data.password),role=data.role)
     db.add(user)
+    bump_versions(db, USERS)
     db.commit()
     db.refresh(user)
     return {"message": "User registered successfully"}
@@ -23,7 +37,7 @@ def login_user(email: str, password: str,db:Session):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid username")
 
-    if not argon2.verify(password, user.password):
+    if not verify_password(password, user.password):
         raise HTTPException(status_code=401, detail="Invalid password")
 
     
@@ -32,75 +46,81 @@ def login_user(email: str, password: str,db:Session):
 
 
 def create_student(data,token_data,db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can create students")
     student = Students(name=data.name,roll_number = data.roll_number,std_class = data.std_class)
     db.add(student)
+    bump_versions(db, STUDENTS)
     db.commit()
     db.refresh(student)
     return student
 
 
 def update_student(std_id: int, data, token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can update students")
 
     student = db.query(Students).filter(Students.std_id == std_id).first()
     if not student:
         raise HTTPException(404, "Student not found")
 
+    if student.std_class != data.std_class:
+        # Cached reports filtered by class include or exclude this student.
+        report_cache.invalidate(db, students=[std_id])
     student.name = data.name
     student.roll_number = data.roll_number
     student.std_class = data.std_class
+    bump_versions(db, STUDENTS)
     db.commit()
     return {"message": "Student updated successfully"}
 
 
 def delete_student(std_id: int, token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can delete students")
 
     student = db.query(Students).filter(Students.std_id == std_id).first()
     if not student:
         raise HTTPException(404, "Student not found")
 
+    report_cache.invalidate(db, students=[std_id])
+    roster_cache.invalidate(db)
+    remove_student_summary(db, std_id)
+    remove_student_alert(db, std_id)
+    db.execute(delete(Attendance).where(Attendance.student_id == std_id))
+    record_removal(db)
     db.delete(student)
+    bump_versions(db, STUDENTS, ASSIGNMENTS)
     db.commit()
     return {"message": "Student deleted successfully"}
 
 
 def get_all_students(token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can view students")
 
-    students = db.query(Students).all()
-    return [
-        {
-            "std_id": s.std_id,
-            "name": s.name,
-            "roll_number": s.roll_number,
-            "std_class": s.std_class
-        }
-        for s in students]
+    return db.execute(_students_stmt()).all()
+
+
+# List and report reads select plain columns; the routes' response models
+# read the row attributes directly when serializing.
+def _students_stmt():
+    return select(Students.std_id, Students.name, Students.roll_number, Students.std_class)
 
 
 
 def get_all_users(token_data, db):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can view users")
-    users = db.query(Users).all()
-    return [
-        {
-            "user_id": u.user_id,
-            "name": u.name,
-            "email": u.email,
-            "role": u.role
-        }
-        for u in users]
+    return db.execute(_users_stmt()).all()
+
+
+def _users_stmt():
+    return select(Users.user_id, Users.name, Users.email, Users.role)
 
 
 def update_teacher(user_id: int, data, token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can update teachers")
 
     teacher = db.query(Users).filter(Users.user_id == user_id,Users.role == "teacher").first()
@@ -109,12 +129,13 @@ def update_teacher(user_id: int, data, token_data, db: Session):
 
     teacher.name = data.name
     teacher.email = data.email
+    bump_versions(db, USERS)
     db.commit()
     return {"message": "Teacher updated successfully"}
 
 
 def delete_teacher(user_id: int, token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can delete teachers")
     teacher = db.query(Users).filter(
         Users.user_id == user_id,
@@ -122,19 +143,30 @@ def delete_teacher(user_id: int, token_data, db: Session):
 
     if not teacher:
         raise HTTPException(404, "Teacher not found")
+    report_cache.invalidate(db, everything=True)
+    roster_cache.invalidate(db, [user_id])
+    remove_teacher_summary(db, user_id)
+    marked = db.scalars(select(Attendance.student_id).where(Attendance.marked_by_teacher == user_id).distinct()).all()
+    db.execute(delete(Attendance).where(Attendance.marked_by_teacher == user_id))
+    record_removal(db)
+    refresh_alerts(db, marked)
+    db.execute(delete(TeacherStudentMap).where(TeacherStudentMap.teacher_id == user_id))
     db.delete(teacher)
+    bump_versions(db, USERS, ASSIGNMENTS)
     db.commit()
     return {"message": "Teacher deleted successfully"}
 
 
 def get_teachers(db: Session):
-    teachers = db.query(Users).filter(Users.role == "teacher").all()
-    return [{"user_id": t.user_id, "name": t.name}
-            for t in teachers]
+    return db.execute(_teachers_stmt()).all()
+
+
+def _teachers_stmt():
+    return select(Users.user_id, Users.name).where(Users.role == "teacher")
 
 
 def assign_student(data, token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can assign students")
     existing = db.query(TeacherStudentMap).filter(TeacherStudentMap.teacher_id == data.teacher_id,
                                                   TeacherStudentMap.student_id == data.student_id).first()
@@ -142,29 +174,73 @@ def assign_student(data, token_data, db: Session):
         raise HTTPException(400, "Student already assigned to this teacher")
     mapping = TeacherStudentMap(teacher_id=data.teacher_id,    student_id=data.student_id)
     db.add(mapping)
+    bump_versions(db, ASSIGNMENTS)
+    report_cache.invalidate(db, teachers=[data.teacher_id])
+    roster_cache.invalidate(db, [data.teacher_id])
     db.commit()
     return {"message": "Student assigned successfully"}
 
 
 
+def bulk_assign_students(data, token_data, db: Session):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin can assign students")
+    _require_teacher(db, data.teacher_id)
+
+    # One INSERT ... SELECT over the selected students; ON CONFLICT skips pairs already present,
+    # including ones a concurrent bulk assign inserts first.
+    pairs = select(literal(data.teacher_id), Students.std_id).where(_selected_students(data))
+    stmt = DIALECT_INSERT[db.get_bind().dialect.name](TeacherStudentMap).from_select(["teacher_id", "student_id"], pairs)
+    assigned = db.execute(stmt.on_conflict_do_nothing(index_elements=["teacher_id", "student_id"])).rowcount
+    _assignments_changed(db, data.teacher_id, assigned)
+    db.commit()
+    return {"message": f"{assigned} students assigned", "assigned": assigned}
+
+
+def bulk_unassign_students(data, token_data, db: Session):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin can unassign students")
+    _require_teacher(db, data.teacher_id)
+
+    selected = select(Students.std_id).where(_selected_students(data))
+    unassigned = db.execute(delete(TeacherStudentMap).where(TeacherStudentMap.teacher_id == data.teacher_id,
+                                                            TeacherStudentMap.student_id.in_(selected))).rowcount
+    _assignments_changed(db, data.teacher_id, unassigned)
+    db.commit()
+    return {"message": f"{unassigned} students unassigned", "unassigned": unassigned}
+
+
+def _require_teacher(db: Session, teacher_id: int):
+    if db.scalar(select(Users.user_id).where(Users.user_id == teacher_id, Users.role == "teacher")) is None:
+        raise HTTPException(404, "Teacher not found")
+
+
+def _selected_students(data):
+    if data.std_class is not None:
+        return Students.std_class == data.std_class
+    return Students.std_id.in_(data.student_ids)
+
+
+def _assignments_changed(db: Session, teacher_id: int, count: int):
+    if count:
+        bump_versions(db, ASSIGNMENTS)
+        report_cache.invalidate(db, teachers=[teacher_id])
+        roster_cache.invalidate(db, [teacher_id])
+
+
 def fetch_assigned_students(token_data, db: Session):
-    if token_data["role"] != "teacher":
+    if token_data.role != "teacher":
         raise HTTPException(403, "Only teacher can view students")
 
-    students = db.query(Students).join(TeacherStudentMap,TeacherStudentMap.student_id == Students.std_id).filter(
-                                       TeacherStudentMap.teacher_id == token_data["user_id"]).all()
-    return [
-        {
-            "std_id": s.std_id,
-            "name": s.name,
-            "roll_number": s.roll_number,
-            "std_class": s.std_class
-        }
-        for s in students]
+    return db.execute(_assigned_students_stmt(roster_cache.roster(db, token_data.user_id))).all()
+
+
+def _assigned_students_stmt(student_ids):
+    return _students_stmt().where(Students.std_id.in_(student_ids))
 
 
 def unassign_student(teacher_id: int, student_id: int, token_data, db: Session):
-    if token_data["role"] != "admin":
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin can unassign students")
 
     mapping = db.query(TeacherStudentMap).filter(
@@ -176,6 +252,9 @@ def unassign_student(teacher_id: int, student_id: int, token_data, db: Session):
         raise HTTPException(404, "Assignment not found")
 
     db.delete(mapping)
+    bump_versions(db, ASSIGNMENTS)
+    report_cache.invalidate(db, teachers=[teacher_id])
+    roster_cache.invalidate(db, [teacher_id])
     db.commit()
 
     return {"message": "Student unassigned successfully"}
@@ -183,94 +262,432 @@ def unassign_student(teacher_id: int, student_id: int, token_data, db: Session):
 
 
 def mark_attendance(db: Session, data, token_data):
-    if token_data["role"] != "teacher":
-        raise HTTPException(403, "Only teacher can mark attendance")
+    return write_queue.submit(db, _mark_attendance, data, token_data)
 
-    mapping = db.query(TeacherStudentMap).filter(
-        TeacherStudentMap.teacher_id == token_data["user_id"],
-        TeacherStudentMap.student_id == data.student_id).first()
 
-    if not mapping:
+def _mark_attendance(db: Session, data, token_data):
+    if token_data.role != "teacher":
+        raise HTTPException(403, "Only teacher can mark attendance")
+
+    if data.student_id not in roster_cache.roster(db, token_data.user_id):
         raise HTTPException(403, "Student not assigned to you")
 
-    exists = db.query(Attendance).filter(Attendance.student_id == data.student_id,
-                                         Attendance.date == data.date).first()
-    if exists:
-        raise HTTPException(400, "Attendance already marked")
-
-    attendance = Attendance(
-        student_id=data.student_id,
-        date=data.date,
-        status=data.status,
-        marked_by_teacher=token_data["user_id"])
-    db.add(attendance)
-    db.commit()
+    change = _upsert_attendance(db, data, token_data.user_id)
+    if change is None:
+        # Nothing written: the day is already marked, by someone else, or (overwriting) with this status.
+        if not data.overwrite:
+            raise HTTPException(400, "Attendance already marked")
+        if _marked_by(db, data) != token_data.user_id:
+            raise HTTPException(403, "You can update only your attendance")
+    else:
+        _attendance_changed(db, data, *change)
     return {"message": "Attendance marked successfully"}
 
 
-def update_attendance(data, token_data, db: Session):
-    attendance = db.query(Attendance).filter(
-        Attendance.student_id == data.student_id,
-        Attendance.date == data.date).first()
+def _upsert_attendance(db: Session, data, teacher_id: int):
+    """Insert the mark, or with data.overwrite correct the teacher's own mark, in one statement.
+
+    Returns the (total, present) change for the summaries, or None if no row was written.
+    """
+    seqs = next_change_seqs(db, 2 if data.overwrite else 1)
+    table = Attendance.__table__
+    stmt = DIALECT_INSERT[db.get_bind().dialect.name](table).values(
+        student_id=data.student_id, date=data.date, status=data.status,
+        marked_by_teacher=teacher_id, change_seq=seqs[0])
+    if data.overwrite:
+        # Only a status flip on the caller's own row updates, and it takes the
+        # second reserved sequence number, which tells it apart from an insert.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "date"],
+            set_={"status": stmt.excluded.status, "change_seq": seqs[-1]},
+            where=and_(table.c.marked_by_teacher == teacher_id, table.c.status != stmt.excluded.status))
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["student_id", "date"])
+    seq = db.scalar(stmt.returning(table.c.change_seq))
+    # A no-op must not move the counter, or change feed polls see a change that never happened.
+    unused = len(seqs) if seq is None else seqs[-1] - seq
+    if unused:
+        release_change_seqs(db, unused)
+    if seq is None:
+        return None
+    return (1, int(data.status)) if seq == seqs[0] else (0, 1 if data.status else -1)
+
+
+def _marked_by(db: Session, data):
+    return db.scalar(select(Attendance.marked_by_teacher)
+                     .where(Attendance.student_id == data.student_id, Attendance.date == data.date))
+
+
+def _attendance_changed(db: Session, data, total: int, present: int):
+    apply_attendance_changes(db, [(data.student_id, data.date, total, present)])
+    report_cache.invalidate(db, students=[data.student_id])
+    refresh_alerts(db, [data.student_id])
+
+
+def bulk_mark_attendance(db: Session, data, token_data):
+    if token_data.role != "teacher":
+        raise HTTPException(403, "Only teacher can mark attendance")
 
-    if not attendance:
-        raise HTTPException(404, "Attendance not found")
+    student_ids = {r.student_id for r in data.records}
+
+    assigned = roster_cache.roster(db, token_data.user_id) & student_ids
+
+    already_marked = {row.student_id for row in db.query(Attendance.student_id).filter(
+        Attendance.date == data.date,
+        Attendance.student_id.in_(student_ids))}
+
+    rows, results, seen = [], [], set()
+    for r in data.records:
+        if r.student_id in seen:
+            result = "duplicate"
+        elif r.student_id not in assigned:
+            result = "not_assigned"
+        elif r.student_id in already_marked:
+            result = "already_marked"
+        else:
+            result = "marked"
+            rows.append({"student_id": r.student_id, "date": data.date,
+                         "status": r.status, "marked_by_teacher": token_data.user_id})
+        seen.add(r.student_id)
+        results.append({"student_id": r.student_id, "result": result})
+
+    if rows:
+        for row, seq in zip(rows, next_change_seqs(db, len(rows))):
+            row["change_seq"] = seq
+        try:
+            db.execute(insert(Attendance), rows)
+            apply_attendance_changes(db, [(r["student_id"], data.date, 1, int(r["status"])) for r in rows])
+            report_cache.invalidate(db, students=[r["student_id"] for r in rows])
+            refresh_alerts(db, [r["student_id"] for r in rows])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(400, "Attendance already marked for some students, please retry")
+
+    return {"message": f"{len(rows)} of {len(data.records)} attendance records marked", "results": results}
 
-    if token_data["role"] == "teacher":
-        if attendance.marked_by_teacher != token_data["user_id"]:
+
+def update_attendance(data, token_data, db: Session):
+    return write_queue.submit(db, _update_attendance, data, token_data)
+
+
+def _update_attendance(db: Session, data, token_data):
+    # The ownership rule is part of the UPDATE; only when it matches nothing
+    # is the row read to tell "not found" from "not yours" from "unchanged".
+    stmt = update(Attendance).where(Attendance.student_id == data.student_id, Attendance.date == data.date,
+                                    Attendance.status != data.status)
+    if token_data.role == "teacher":
+        stmt = stmt.where(Attendance.marked_by_teacher == token_data.user_id)
+    updated = db.scalar(stmt.values(status=data.status, change_seq=next_change_seqs(db)[0])
+                        .returning(Attendance.id).execution_options(synchronize_session=False))
+
+    if updated is None:
+        release_change_seqs(db, 1)
+        marked_by = _marked_by(db, data)
+        if marked_by is None:
+            raise HTTPException(404, "Attendance not found")
+        if token_data.role == "teacher" and marked_by != token_data.user_id:
             raise HTTPException(403, "You can update only your attendance")
+    else:
+        _attendance_changed(db, data, 0, 1 if data.status else -1)
+    return {"message": "Attendance updated successfully"}
 
-    attendance.status = data.status
-    db.commit()
 
-    return {"message": "Attendance updated successfully"}
 
+NO_FILTERS = ReportFilters()
 
 
-def attendance_report(token_data, db: Session):
-    if token_data["role"] == "admin":
-        return db.query(Attendance).all()
-    return db.query(Attendance).join(TeacherStudentMap, TeacherStudentMap.student_id == Attendance.student_id) \
-        .filter(TeacherStudentMap.teacher_id == token_data["user_id"]).all()
+def _student_conditions(student_column, token_data, filters):
+    # Restricts a student_id column to the caller's students and the student/class filters.
+    conditions = []
+    if token_data.role != "admin":
+        conditions.append(student_column.in_(
+            select(TeacherStudentMap.student_id).where(TeacherStudentMap.teacher_id == token_data.user_id)))
+    if filters.student_id is not None:
+        conditions.append(student_column == filters.student_id)
+    if filters.std_class is not None:
+        conditions.append(student_column.in_(select(Students.std_id).where(Students.std_class == filters.std_class)))
+    return conditions
 
 
-def student_wise_report(token_data, db: Session):
-    if token_data["role"] != "admin":
-        raise HTTPException(403, "Only admin")
+def _attendance_conditions(token_data, filters):
+    conditions = _student_conditions(Attendance.student_id, token_data, filters)
+    if filters.teacher_id is not None:
+        conditions.append(Attendance.marked_by_teacher == filters.teacher_id)
+    if filters.date_from is not None:
+        conditions.append(Attendance.date >= filters.date_from)
+    if filters.date_to is not None:
+        conditions.append(Attendance.date <= filters.date_to)
+    return conditions
+
+
+def attendance_report(token_data, db: Session, filters=NO_FILTERS):
+    return db.execute(_attendance_report_stmt(token_data, filters)).all()
+
+
+def _attendance_report_stmt(token_data, filters=NO_FILTERS):
+    return select(Attendance.id, Attendance.student_id, Attendance.date,
+                  Attendance.status, Attendance.marked_by_teacher).where(*_attendance_conditions(token_data, filters))
+
+
+REPORT_PAGE_SIZE = 500
+REPORT_STREAM_CHUNK = 1000
+
+
+def _attendance_rows_stmt(token_data, filters=NO_FILTERS):
+    return _attendance_report_stmt(token_data, filters).order_by(Attendance.date, Attendance.id)
+
+
+def _attendance_dict(r):
+    return {
+        "id": r.id,
+        "student_id": r.student_id,
+        "date": r.date.isoformat(),
+        "status": r.status,
+        "marked_by_teacher": r.marked_by_teacher
+    }
+
+
+def _decode_cursor(cursor: str):
+    try:
+        day, last_id = cursor.split(":")
+        return date.fromisoformat(day), int(last_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
 
-    result = db.query(
-        Attendance.student_id,func.count(Attendance.id).label("total_days"),
-        func.sum(func.case((Attendance.status == True, 1), else_=0)).label("present_days")).group_by(Attendance.student_id).all()
 
-    return [
-        {
-            "student_id": r.student_id,
-            "total_days": r.total_days,
-            "present_days": r.present_days,
-            "absent_days": r.total_days - r.present_days,
-            "present_percent": round((r.present_days / r.total_days) * 100, 2)
-        }
-        for r in result
-    ]
+def _attendance_page_stmt(token_data, cursor: str, limit: int, filters=NO_FILTERS):
+    return _keyset_page(_attendance_rows_stmt(token_data, filters), cursor, limit)
 
 
-def month_wise_report(token_data, db: Session):
-    if token_data["role"] != "admin":
+def _keyset_page(stmt, cursor: str, limit: int):
+    if limit < 1 or limit > REPORT_PAGE_SIZE:
+        raise HTTPException(400, f"limit must be between 1 and {REPORT_PAGE_SIZE}")
+
+    if cursor:
+        last_date, last_id = _decode_cursor(cursor)
+        # The redundant date >= bound gives the planner an index range to seek on.
+        stmt = stmt.where(Attendance.date >= last_date,
+                          or_(Attendance.date > last_date,
+                              and_(Attendance.date == last_date, Attendance.id > last_id)))
+    return stmt.limit(limit + 1)
+
+
+def _attendance_page(rows, limit: int):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1].date.isoformat()}:{rows[-1].id}"
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def attendance_report_page(token_data, db: Session, cursor: str = None, limit: int = None, filters=NO_FILTERS):
+    limit = limit or REPORT_PAGE_SIZE
+    rows = db.execute(_attendance_page_stmt(token_data, cursor, limit, filters)).all()
+    return _attendance_page(rows, limit)
+
+
+def _enriched_report_stmt(token_data, filters):
+    return select(Attendance.id, Attendance.student_id, Students.name.label("student_name"), Students.std_class,
+                  Attendance.date, Attendance.status, Attendance.marked_by_teacher,
+                  Users.name.label("teacher_name")) \
+        .join(Students, Students.std_id == Attendance.student_id) \
+        .join(Users, Users.user_id == Attendance.marked_by_teacher) \
+        .where(*_attendance_conditions(token_data, filters)) \
+        .order_by(Attendance.date, Attendance.id)
+
+
+def enriched_attendance_report(token_data, filters, db: Session, cursor: str = None, limit: int = None):
+    limit = limit or REPORT_PAGE_SIZE
+    rows = db.execute(_keyset_page(_enriched_report_stmt(token_data, filters), cursor, limit)).all()
+    return _attendance_page(rows, limit)
+
+
+def stream_attendance_report(token_data, filters=NO_FILTERS):
+    # Runs after the request's session is closed, so it owns its own session.
+    db = SessionLocal()
+    try:
+        rows = db.execute(_attendance_rows_stmt(token_data, filters).execution_options(yield_per=REPORT_STREAM_CHUNK))
+        for r in rows:
+            yield json.dumps(_attendance_dict(r)) + "\n"
+    finally:
+        db.close()
+
+
+def attendance_changes(token_data, db: Session, since: str = None, limit: int = None):
+    limit = _changes_limit(limit)
+    # Counters first: rows read afterwards include everything up to the head they report.
+    counters = dict(db.execute(_change_counters_stmt()).all())
+    after, reset, scope = _changes_start(token_data, counters, since)
+    rows = db.execute(_changes_stmt(token_data, after, limit)).all() if counters.get(ATTENDANCE, 0) > after else []
+    return _changes_page(rows, limit, counters, after, reset, scope)
+
+
+def _changes_limit(limit: int):
+    limit = limit or REPORT_PAGE_SIZE
+    if limit < 1 or limit > REPORT_PAGE_SIZE:
+        raise HTTPException(400, f"limit must be between 1 and {REPORT_PAGE_SIZE}")
+    return limit
+
+
+def _change_counters_stmt():
+    return select(TableVersion.name, TableVersion.version) \
+        .where(TableVersion.name.in_([ATTENDANCE, ATTENDANCE_REMOVED, ASSIGNMENTS]))
+
+
+def _changes_start(token_data, counters, since: str):
+    """(sequence to read after, whether the client must start over, roster scope)."""
+    # A teacher's cursor also carries the assignments version, since a roster
+    # change alters which existing rows they can see.
+    scope = counters.get(ASSIGNMENTS, 0) if token_data.role != "admin" else 0
+    if since is None:
+        return -1, False, scope
+    try:
+        seq, since_scope = (int(part) for part in since.split("."))
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+    if since_scope != scope or counters.get(ATTENDANCE_REMOVED, 0) > seq:
+        return -1, True, scope
+    return seq, False, scope
+
+
+def _changes_stmt(token_data, after: int, limit: int):
+    return select(Attendance.id, Attendance.student_id, Attendance.date, Attendance.status,
+                  Attendance.marked_by_teacher, Attendance.change_seq) \
+        .where(Attendance.change_seq > after, *_attendance_conditions(token_data, NO_FILTERS)) \
+        .order_by(Attendance.change_seq).limit(limit + 1)
+
+
+def _changes_page(rows, limit: int, counters, after: int, reset: bool, scope: int):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        seq = rows[-1].change_seq
+    else:
+        seq = max(counters.get(ATTENDANCE, 0), after, rows[-1].change_seq if rows else 0)
+    return {"items": rows, "cursor": f"{seq}.{scope}", "reset": reset, "has_more": has_more}
+
+
+def student_wise_report(token_data, db: Session, filters=NO_FILTERS):
+    if token_data.role not in ("admin", "teacher"):
+        raise HTTPException(403, "Only admin or teacher")
+
+    # All-time counts come from the summary table; a date range comes from the
+    # presence bitmaps when they are on; anything else aggregates attendance.
+    if _all_time(filters):
+        result = db.execute(_student_report_stmt(token_data, filters)).all()
+    elif bitmap.ATTENDANCE_BITMAPS and filters.teacher_id is None:
+        date_from, date_to = _date_bounds(filters.date_from, filters.date_to)
+        rows = db.scalars(_student_bitmap_stmt(token_data, filters))
+        return _student_range_report(bitmap.range_counts(rows, date_from, date_to))
+    else:
+        result = db.execute(_student_range_stmt(token_data, filters)).all()
+    return [_student_report_dict(r) for r in result]
+
+
+def _all_time(filters):
+    return filters.date_from is None and filters.date_to is None and filters.teacher_id is None
+
+
+def _date_bounds(date_from: date, date_to: date):
+    return date_from or date(1900, 1, 1), date_to or date(9999, 12, 31)
+
+
+def _student_bitmap_stmt(token_data, filters):
+    date_from, date_to = _date_bounds(filters.date_from, filters.date_to)
+    return bitmap.range_stmt(date_from, date_to) \
+        .where(*_student_conditions(AttendanceBitmap.student_id, token_data, filters))
+
+
+def _student_range_stmt(token_data, filters):
+    return select(Attendance.student_id, func.count(Attendance.id).label("total_days"),
+                  func.sum(case((Attendance.status == True, 1), else_=0)).label("present_days")) \
+        .where(*_attendance_conditions(token_data, filters)) \
+        .group_by(Attendance.student_id).order_by(Attendance.student_id)
+
+
+def _student_range_report(counts):
+    return [_student_report_dict(SimpleNamespace(student_id=student_id, total_days=total, present_days=present))
+            for student_id, (total, present) in counts.items()]
+
+
+def _student_report_stmt(token_data, filters=NO_FILTERS):
+    return select(StudentAttendanceSummary.student_id, StudentAttendanceSummary.total_days,
+                  StudentAttendanceSummary.present_days) \
+        .where(StudentAttendanceSummary.total_days > 0,
+               *_student_conditions(StudentAttendanceSummary.student_id, token_data, filters)) \
+        .order_by(StudentAttendanceSummary.student_id)
+
+
+def _student_report_dict(r):
+    return {
+        "student_id": r.student_id,
+        "total_days": r.total_days,
+        "present_days": r.present_days,
+        "absent_days": r.total_days - r.present_days,
+        "present_percent": round((r.present_days / r.total_days) * 100, 2)
+    }
+
+
+def month_wise_report(token_data, db: Session, filters=NO_FILTERS):
+    if token_data.role != "admin":
         raise HTTPException(403, "Only admin")
 
-    result = db.query(func.strftime('%Y-%m', Attendance.date).label("month"),func.count(Attendance.id).label("total"),
-        func.sum(func.case((Attendance.status == True, 1), else_=0)).label("present")).group_by("month").all()
+    if filters == NO_FILTERS:
+        result = db.execute(_month_report_stmt()).all()
+    else:
+        result = _month_range_report(db.execute(_month_range_stmt(token_data, filters)))
+    return [_month_report_dict(r) for r in result]
+
+
+def _month_range_stmt(token_data, filters):
+    # Grouped per day rather than per month so the SQL stays portable; at most
+    # one row per school day is folded into months in Python.
+    return select(Attendance.date, func.count(Attendance.id).label("total_days"),
+                  func.sum(case((Attendance.status == True, 1), else_=0)).label("present_days")) \
+        .where(*_attendance_conditions(token_data, filters)) \
+        .group_by(Attendance.date).order_by(Attendance.date)
+
+
+def _month_range_report(rows):
+    months = defaultdict(lambda: [0, 0])
+    for r in rows:
+        counts = months[month_key(r.date)]
+        counts[0] += r.total_days
+        counts[1] += r.present_days
+    return [SimpleNamespace(month=month, total_days=total, present_days=present)
+            for month, (total, present) in months.items()]
 
-    return [
-        {
-            "month": r.month,
-            "total_days": r.total,
-            "present": r.present,
-            "absent": r.total - r.present,
-            "present_percent": round((r.present / r.total) * 100, 2)
-        }
-        for r in result
-    ]
 
+def _month_report_stmt():
+    return select(MonthAttendanceSummary.month, MonthAttendanceSummary.total_days,
+                  MonthAttendanceSummary.present_days).where(MonthAttendanceSummary.total_days > 0) \
+        .order_by(MonthAttendanceSummary.month)
+
+
+def _month_report_dict(r):
+    return {
+        "month": r.month,
+        "total_days": r.total_days,
+        "present": r.present_days,
+        "absent": r.total_days - r.present_days,
+        "present_percent": round((r.present_days / r.total_days) * 100, 2)
+    }
+
+
+def absentee_alerts(token_data, db: Session):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin")
+
+    return [_alert_dict(r) for r in db.execute(flagged_stmt())]
 
 
+def _alert_dict(r):
+    return {
+        "student_id": r.student_id,
+        "last_date": r.last_date,
+        "window_days": r.window_days,
+        "window_present": r.window_present,
+        "present_ratio": round(r.window_present / r.window_days, 4),
+        "absence_streak": r.absence_streak
+    }
@@ -0,0 +1,85 @@
+import csv
+import io
+from fastapi import HTTPException
+from database.db import SessionLocal
+from services.content import _enriched_report_stmt,REPORT_STREAM_CHUNK
+
+# Streaming attendance exports. Rows are read in REPORT_STREAM_CHUNK batches
+# and each batch is encoded and sent before the next one is fetched, so
+# memory stays flat for a full year of data.
+
+EXPORT_COLUMNS = ["id", "student_id", "student_name", "std_class", "date", "status", "marked_by_teacher", "teacher_name"]
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _chunks(token_data, filters):
+    # Runs after the request's session is closed, so it owns its own session.
+    db = SessionLocal()
+    try:
+        result = db.execute(_enriched_report_stmt(token_data, filters).execution_options(yield_per=REPORT_STREAM_CHUNK))
+        for chunk in result.partitions():
+            yield chunk
+    finally:
+        db.close()
+
+
+def _csv_stream(token_data, filters):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(token_data, filters):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ByteSink(io.RawIOBase):
+    def __init__(self):
+        self.parts, self.position = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _parquet_stream(token_data, filters):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("id", pa.int64()), ("student_id", pa.int64()), ("student_name", pa.string()),
+                        ("std_class", pa.int32()), ("date", pa.date32()), ("status", pa.bool_()),
+                        ("marked_by_teacher", pa.int64()), ("teacher_name", pa.string())])
+    sink = _ByteSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in _chunks(token_data, filters):
+            # One row group per chunk.
+            writer.write_table(pa.Table.from_pylist([r._asdict() for r in chunk], schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_attendance(token_data, filters, fmt: str):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin can export attendance")
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(400, f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(400, "Parquet export needs pyarrow installed on the server")
+        return _parquet_stream(token_data, filters), EXPORT_FORMATS[fmt]
+    return _csv_stream(token_data, filters), EXPORT_FORMATS[fmt]
@@ -0,0 +1,122 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from fastapi import Request
+from services.metrics import Counter, Histogram
+
+# Per-request latency and SQL accounting. Engine events add to the stats of
+# the request that issued the statement (found through a context variable,
+# which Starlette copies into threadpool workers and the write queue runs
+# its operations in), and the middleware turns them into /metrics series
+# labelled by route template once the response body has been sent, so
+# streamed responses include the queries that produce them.
+
+QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", "20"))
+
+logger = logging.getLogger("attendance.requests")
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route template",
+                            labels=("method", "route", "status"))
+REQUEST_QUERIES = Histogram("http_request_sql_statements", "SQL statements executed per request",
+                            labels=("method", "route"), buckets=(1, 2, 3, 5, 10, 20, 50, 100))
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL per request",
+                            labels=("method", "route"))
+REQUEST_DB_ROWS = Counter("http_request_db_rows_total",
+                          "Rows fetched from SELECT and RETURNING statements plus rows changed by other DML",
+                          labels=("method", "route"))
+
+_stats = ContextVar("request_db_stats", default=None)
+
+
+class _Stats:
+    __slots__ = ("queries", "db_time", "rows")
+
+    def __init__(self):
+        self.queries, self.db_time, self.rows = 0, 0.0, 0
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+class _CountingCursor:
+    """Counts the rows a result fetches; rowcount is -1 for SELECT on SQLite."""
+
+    def __init__(self, cursor, stats):
+        self._cursor, self._stats = cursor, stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _stats.get()
+    if stats is None:
+        return
+    stats.queries += 1
+    stats.db_time += time.perf_counter() - context._query_started
+    if cursor.description is not None:
+        context.cursor = _CountingCursor(cursor, stats)  # the result fetches through this
+    elif cursor.rowcount and cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+
+
+def _observe(request: Request, stats: _Stats, status: int, started: float):
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    template = route.path if route is not None else "unmatched"
+    REQUEST_LATENCY.observe(elapsed, method=request.method, route=template, status=status)
+    REQUEST_QUERIES.observe(stats.queries, method=request.method, route=template)
+    REQUEST_DB_TIME.observe(stats.db_time, method=request.method, route=template)
+    REQUEST_DB_ROWS.inc(stats.rows, method=request.method, route=template)
+    if stats.queries > QUERY_COUNT_WARN:
+        logger.warning("%s %s ran %d SQL statements (%.1f ms in DB, %.1f ms total)", request.method, template,
+                       stats.queries, stats.db_time * 1000, elapsed * 1000)
+
+
+async def request_metrics(request: Request, call_next):
+    stats = _Stats()
+    token = _stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        _observe(request, stats, 500, started)
+        raise
+    finally:
+        _stats.reset(token)
+    body = response.body_iterator
+
+    async def observed_body():
+        # The app runs with the request's stats in its context until the last chunk is produced.
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            _observe(request, stats, response.status_code, started)
+
+    response.body_iterator = observed_body()
+    return response
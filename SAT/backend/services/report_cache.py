@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database.db import SessionLocal
+from models.table_schema import TeacherStudentMap, TableVersion
+from services.changes import ATTENDANCE
+from services.metrics import Counter
+from services.versions import STUDENTS, ASSIGNMENTS
+
+# Rendered-response cache for the attendance, student-wise and month-wise
+# reports. Keys carry the caller's scope ("admin" or "teacher:<id>"), the
+# report name, its filters and the scope's current generation. Writes call
+# invalidate() inside their transaction; the affected generations are bumped
+# only after the commit, so a report can never be cached under a generation
+# that already includes an uncommitted or rolled-back change.
+#
+# REPORT_CACHE selects the backend: "memory" (default, per process), "off",
+# or a redis:// URL shared by every worker (needs `pip install redis`).
+# Async routes use alookup()/astore(), which move the blocking Redis calls
+# off the event loop.
+#
+# The memory backend only sees this worker's writes. Like the roster cache,
+# it re-reads the attendance, students and assignments versions at most every
+# REPORT_VERSION_TTL seconds and drops everything when any of them moved.
+
+REPORT_CACHE = os.getenv("REPORT_CACHE", "memory")
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", "3600"))  # shared backends only
+REPORT_VERSION_TTL = float(os.getenv("REPORT_VERSION_TTL", "1.0"))  # memory backend only
+
+REPORT_CACHE_REQUESTS = Counter("report_cache_requests_total", "Report response cache lookups",
+                                labels=("report", "result"))
+
+ALL = "all"
+ADMIN = "admin"
+
+
+def teacher_scope(teacher_id: int):
+    return f"teacher:{teacher_id}"
+
+
+class MemoryBackend:
+    """LRU over rendered bodies, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._versions = None
+        self._checked_at = float("-inf")
+
+    def due(self):
+        return time.monotonic() - self._checked_at >= REPORT_VERSION_TTL
+
+    def check_versions(self):
+        now = time.monotonic()
+        with SessionLocal() as db:
+            versions = db.execute(select(TableVersion.name, TableVersion.version)
+                                  .where(TableVersion.name.in_([ATTENDANCE, STUDENTS, ASSIGNMENTS]))
+                                  .order_by(TableVersion.name)).all()
+        with self._lock:
+            if versions != self._versions:
+                # Bumping ALL as well keeps reports computed before the check from being stored under a live key.
+                self._entries.clear()
+                self._size = 0
+                self._generations[ALL] = self._generations.get(ALL, 0) + 1
+                self._versions = versions
+            self._checked_at = now
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key, body: bytes):
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def generations(self, names):
+        with self._lock:
+            return [self._generations.get(name, 0) for name in names]
+
+    def bump(self, names):
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+
+class RedisBackend:
+    """Shared across workers. Old generations are never read again and age out via the TTL."""
+
+    def __init__(self, url: str, ttl: int):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(f"report:{key}")
+
+    def set(self, key, body: bytes):
+        self.client.set(f"report:{key}", body, ex=self.ttl)
+
+    def generations(self, names):
+        return [int(v or 0) for v in self.client.mget([f"report-gen:{name}" for name in names])]
+
+    def bump(self, names):
+        with self.client.pipeline() as pipe:
+            for name in names:
+                pipe.incr(f"report-gen:{name}")
+            pipe.execute()
+
+
+def make_backend(setting: str):
+    if setting == "off":
+        return None
+    if setting == "memory":
+        return MemoryBackend(REPORT_CACHE_MAX_BYTES)
+    if setting.startswith(("redis://", "rediss://")):
+        return RedisBackend(setting, REPORT_CACHE_TTL)
+    raise ValueError(f"Unknown REPORT_CACHE backend: {setting}")
+
+
+BACKEND = make_backend(REPORT_CACHE)
+
+
+def _scope(token_data):
+    return ADMIN if token_data.role == "admin" else teacher_scope(token_data.user_id)
+
+
+def lookup(token_data, report: str, **params):
+    """Return (key, cached response or None). Read the generation before the report is computed."""
+    if BACKEND is None:
+        return None, None
+    if isinstance(BACKEND, MemoryBackend) and BACKEND.due():
+        BACKEND.check_versions()
+    scope = _scope(token_data)
+    everything, current = BACKEND.generations([ALL, scope])
+    filters = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if v is not None)
+    key = f"{scope}:{everything}.{current}:{report}?{filters}"
+    body = BACKEND.get(key)
+    REPORT_CACHE_REQUESTS.inc(report=report, result="miss" if body is None else "hit")
+    if body is None:
+        return key, None
+    return key, Response(content=body, media_type="application/json")
+
+
+@lru_cache
+def _adapter(model):
+    return TypeAdapter(model)
+
+
+def store(key, result, model):
+    """Render result through its response model (attributes read from rows) and cache the bytes."""
+    adapter = _adapter(model)
+    body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+    if key is not None:
+        BACKEND.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+
+async def alookup(token_data, report: str, **params):
+    if isinstance(BACKEND, RedisBackend) or isinstance(BACKEND, MemoryBackend) and BACKEND.due():
+        return await run_in_threadpool(lookup, token_data, report, **params)
+    return lookup(token_data, report, **params)
+
+
+async def astore(key, result, model):
+    if key is not None and isinstance(BACKEND, RedisBackend):
+        return await run_in_threadpool(store, key, result, model)
+    return store(key, result, model)
+
+
+def invalidate(db: Session, students=(), teachers=(), everything=False):
+    """Mark reports stale once db commits.
+
+    students: attendance of these students changed, which touches the admin
+    reports and the report of every teacher assigned to them.
+    teachers: these teachers' visible set of students changed.
+    """
+    if BACKEND is None:
+        return
+    scopes = db.info.setdefault("report_cache_scopes", set())
+    if everything:
+        scopes.add(ALL)
+    scopes.update(teacher_scope(t) for t in teachers)
+    students = set(students)
+    if students:
+        scopes.add(ADMIN)
+        scopes.update(teacher_scope(t) for t in db.scalars(
+            select(TeacherStudentMap.teacher_id).where(TeacherStudentMap.student_id.in_(students)).distinct()))
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    scopes = session.info.pop("report_cache_scopes", None)
+    if scopes and BACKEND is not None:
+        BACKEND.bump(sorted(scopes))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("report_cache_scopes", None)
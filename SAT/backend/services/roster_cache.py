@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from models.table_schema import TeacherStudentMap, TableVersion
+from services.metrics import Counter
+from services.versions import ASSIGNMENTS
+
+# Per-teacher sets of assigned student ids, loaded on first use. Writes that
+# change assignments call invalidate() in their transaction; this worker
+# drops the entries after the commit. Other workers notice through the
+# teacher_student_map version (see services/versions.py), which they re-read
+# at most every ROSTER_VERSION_TTL seconds and which clears their whole
+# cache when it moves.
+
+ROSTER_CACHE_SIZE = int(os.getenv("ROSTER_CACHE_SIZE", "1024"))
+ROSTER_VERSION_TTL = float(os.getenv("ROSTER_VERSION_TTL", "1.0"))
+
+ROSTER_CACHE = Counter("roster_cache_requests_total", "Teacher roster cache lookups", labels=("result",))
+
+_rosters = OrderedDict()
+_lock = threading.Lock()
+_state = {"version": None, "checked_at": 0.0, "generation": 0}
+
+
+def _clear(teacher_ids=None):
+    # Callers hold _lock. The generation stops loads that started before the
+    # clear from storing what they read.
+    if teacher_ids is None:
+        _rosters.clear()
+    else:
+        for teacher_id in teacher_ids:
+            _rosters.pop(teacher_id, None)
+    _state["generation"] += 1
+
+
+def _check_version(db: Session):
+    now = time.monotonic()
+    with _lock:
+        if now - _state["checked_at"] < ROSTER_VERSION_TTL:
+            return
+    version = db.scalar(select(TableVersion.version).where(TableVersion.name == ASSIGNMENTS)) or 0
+    with _lock:
+        if version != _state["version"]:
+            _clear()
+            _state["version"] = version
+        _state["checked_at"] = now
+
+
+def roster(db: Session, teacher_id: int):
+    """frozenset of the student ids assigned to teacher_id."""
+    _check_version(db)
+    with _lock:
+        students = _rosters.get(teacher_id)
+        if students is not None:
+            _rosters.move_to_end(teacher_id)
+            ROSTER_CACHE.inc(result="hit")
+            return students
+        generation = _state["generation"]
+    ROSTER_CACHE.inc(result="miss")
+
+    students = frozenset(db.scalars(select(TeacherStudentMap.student_id)
+                                    .where(TeacherStudentMap.teacher_id == teacher_id)))
+    with _lock:
+        if _state["generation"] == generation:
+            _rosters[teacher_id] = students
+            if len(_rosters) > ROSTER_CACHE_SIZE:
+                _rosters.popitem(last=False)
+    return students
+
+
+def invalidate(db: Session, teacher_ids=None):
+    """Drop the rosters of teacher_ids (all rosters if None) once db commits."""
+    pending = db.info.setdefault("roster_cache_teachers", set())
+    if teacher_ids is None:
+        db.info["roster_cache_all"] = True
+    else:
+        pending.update(teacher_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session):
+    everything = session.info.pop("roster_cache_all", False)
+    teachers = session.info.pop("roster_cache_teachers", None)
+    if everything or teachers:
+        with _lock:
+            _clear(None if everything else teachers)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("roster_cache_all", None)
+    session.info.pop("roster_cache_teachers", None)
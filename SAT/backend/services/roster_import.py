@@ -0,0 +1,153 @@
+import codecs
+import csv
+import io
+import sys
+from itertools import islice
+from fastapi import HTTPException
+from sqlalchemy import select,insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database.db import SessionLocal
+from models.table_schema import Users,Students,TeacherStudentMap
+from services.versions import bump_versions,STUDENTS,ASSIGNMENTS
+from services import roster_cache
+
+# Bulk roster import. The CSV needs name, roll_number and std_class columns
+# and may carry a teacher_id column to assign each student on the way in.
+# Rows are handled in batches: one roll-number lookup, one teacher lookup,
+# one executemany insert per table and one commit per batch.
+#
+#   python -m services.roster_import students.csv
+
+IMPORT_BATCH = 500
+IMPORT_ATTEMPTS = 2  # a batch is retried once if a concurrent write takes one of its roll numbers
+REQUIRED_COLUMNS = {"name", "roll_number", "std_class"}
+
+
+def _parse(line_no, row):
+    name = (row.get("name") or "").strip()
+    roll_number = (row.get("roll_number") or "").strip()
+    if not name or not roll_number:
+        return None, "name and roll_number are required"
+    try:
+        std_class = int(row.get("std_class") or "")
+        teacher = (row.get("teacher_id") or "").strip()
+        teacher_id = int(teacher) if teacher else None
+    except ValueError:
+        return None, "std_class and teacher_id must be numbers"
+    return {"line": line_no, "name": name, "roll_number": roll_number,
+            "std_class": std_class, "teacher_id": teacher_id}, None
+
+
+def _import_batch(db: Session, batch, seen_rolls, report):
+    for _ in range(IMPORT_ATTEMPTS):
+        try:
+            errors, seen, created, assigned = _try_batch(db, batch, seen_rolls)
+        except IntegrityError:
+            db.rollback()
+            continue
+        report["errors"].extend(errors)
+        seen_rolls.update(seen)
+        report["created"] += created
+        report["assigned"] += assigned
+        return
+    report["errors"].extend({"line": r["line"], "roll_number": r["roll_number"],
+                             "error": "conflicting concurrent import, please retry"} for r in batch)
+    seen_rolls.update(r["roll_number"] for r in batch)
+
+
+def _try_batch(db: Session, batch, seen_rolls):
+    # Checks, inserts and commits one batch; errors and seen roll numbers only
+    # count once the commit succeeded.
+    errors, seen = [], set()
+    rolls = [r["roll_number"] for r in batch]
+    existing = set(db.scalars(select(Students.roll_number).where(Students.roll_number.in_(rolls))))
+    teacher_ids = {r["teacher_id"] for r in batch if r["teacher_id"] is not None}
+    teachers = set(db.scalars(select(Users.user_id).where(Users.user_id.in_(teacher_ids),
+                                                          Users.role == "teacher"))) if teacher_ids else set()
+
+    accepted = []
+    for r in batch:
+        if r["roll_number"] in existing:
+            errors.append({"line": r["line"], "roll_number": r["roll_number"], "error": "roll_number already exists"})
+        elif r["roll_number"] in seen_rolls or r["roll_number"] in seen:
+            errors.append({"line": r["line"], "roll_number": r["roll_number"], "error": "duplicate roll_number in file"})
+        elif r["teacher_id"] is not None and r["teacher_id"] not in teachers:
+            errors.append({"line": r["line"], "roll_number": r["roll_number"], "error": "teacher not found"})
+        else:
+            accepted.append(r)
+        seen.add(r["roll_number"])
+    if not accepted:
+        return errors, seen, 0, 0
+
+    created = db.execute(insert(Students).returning(Students.std_id, sort_by_parameter_order=True),
+                         [{"name": r["name"], "roll_number": r["roll_number"], "std_class": r["std_class"]}
+                          for r in accepted]).scalars().all()
+    assignments = [{"teacher_id": r["teacher_id"], "student_id": std_id}
+                   for r, std_id in zip(accepted, created) if r["teacher_id"] is not None]
+    if assignments:
+        db.execute(insert(TeacherStudentMap), assignments)
+    bump_versions(db, STUDENTS, *([ASSIGNMENTS] if assignments else []))
+    roster_cache.invalidate(db, {a["teacher_id"] for a in assignments})
+    db.commit()
+    return errors, seen, len(created), len(assignments)
+
+
+def import_roster(lines, db: Session):
+    reader = csv.DictReader(lines)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(400, f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    report = {"created": 0, "assigned": 0, "errors": []}
+    seen_rolls = set()
+    rows = enumerate(reader, start=2)
+    while chunk := list(islice(rows, IMPORT_BATCH)):
+        batch = []
+        for line_no, row in chunk:
+            parsed, error = _parse(line_no, row)
+            if error:
+                report["errors"].append({"line": line_no, "roll_number": row.get("roll_number"), "error": error})
+            else:
+                batch.append(parsed)
+        if batch:
+            _import_batch(db, batch, seen_rolls, report)
+    report["errors"].sort(key=lambda e: e["line"])
+    return report
+
+
+def _check_utf8(binary):
+    # Batches commit as they go, so the encoding is checked before the first one
+    # rather than failing halfway through the file.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        while chunk := binary.read(64 * 1024):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(400, "CSV must be UTF-8 encoded (in Excel, save as \"CSV UTF-8\")")
+    binary.seek(0)
+
+
+def _text(binary):
+    _check_utf8(binary)
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def import_roster_upload(token_data, upload, db: Session):
+    if token_data.role != "admin":
+        raise HTTPException(403, "Only admin can import students")
+    return import_roster(_text(upload.file), db)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m services.roster_import students.csv")
+    with open(sys.argv[1], "rb") as f, SessionLocal() as session:
+        try:
+            result = import_roster(_text(f), session)
+        except HTTPException as e:
+            sys.exit(e.detail)
+    for error in result["errors"]:
+        print(f"line {error['line']}: {error['roll_number']}: {error['error']}")
+    print(f"{result['created']} students created, {result['assigned']} assignments, {len(result['errors'])} errors")
@@ -0,0 +1,126 @@
+import sys
+from collections import defaultdict
+from sqlalchemy import func, case, delete
+from sqlalchemy.orm import Session
+from database.db import SessionLocal, DIALECT_INSERT
+from models.table_schema import Attendance, StudentAttendanceSummary, MonthAttendanceSummary
+from services import bitmap
+
+# Counters behind the student-wise and month-wise reports. Every attendance
+# write calls apply_attendance_changes() inside its own transaction, so the
+# summaries commit (or roll back) together with the attendance rows.
+
+def month_key(day):
+    return day.strftime("%Y-%m")
+
+
+def _bump(db: Session, model, key: str, deltas: dict):
+    if not deltas:
+        return
+    table = model.__table__
+    stmt = DIALECT_INSERT[db.get_bind().dialect.name](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={"total_days": table.c.total_days + stmt.excluded.total_days,
+              "present_days": table.c.present_days + stmt.excluded.present_days})
+    db.execute(stmt, [{key: k, "total_days": total, "present_days": present}
+                      for k, (total, present) in deltas.items()])
+
+
+def apply_attendance_changes(db: Session, changes):
+    """changes: iterable of (student_id, date, total_delta, present_delta)."""
+    changes = list(changes)
+    if bitmap.ATTENDANCE_BITMAPS:
+        bitmap.apply_bitmap_changes(db, changes)
+    by_student = defaultdict(lambda: [0, 0])
+    by_month = defaultdict(lambda: [0, 0])
+    for student_id, day, total, present in changes:
+        for counters in (by_student[student_id], by_month[month_key(day)]):
+            counters[0] += total
+            counters[1] += present
+    _bump(db, StudentAttendanceSummary, "student_id", by_student)
+    _bump(db, MonthAttendanceSummary, "month", by_month)
+
+
+def remove_student_summary(db: Session, student_id: int):
+    by_month = defaultdict(lambda: [0, 0])
+    for r in db.query(Attendance.date, Attendance.status).filter(Attendance.student_id == student_id):
+        by_month[month_key(r.date)][0] -= 1
+        by_month[month_key(r.date)][1] -= int(r.status)
+    _bump(db, MonthAttendanceSummary, "month", by_month)
+    db.execute(delete(StudentAttendanceSummary).where(StudentAttendanceSummary.student_id == student_id))
+    if bitmap.ATTENDANCE_BITMAPS:
+        bitmap.remove_student_bitmaps(db, student_id)
+
+
+def remove_teacher_summary(db: Session, teacher_id: int):
+    # Attendance rows cascade with the teacher who marked them.
+    rows = db.query(Attendance.student_id, Attendance.date, Attendance.status) \
+        .filter(Attendance.marked_by_teacher == teacher_id)
+    apply_attendance_changes(db, [(r.student_id, r.date, -1, -int(r.status)) for r in rows])
+
+
+def _computed(db: Session):
+    present = func.sum(case((Attendance.status == True, 1), else_=0))
+    students = {r.student_id: (r.total, r.present) for r in db.query(
+        Attendance.student_id, func.count(Attendance.id).label("total"), present.label("present"))
+        .group_by(Attendance.student_id)}
+    months = defaultdict(lambda: [0, 0])
+    for r in db.query(Attendance.date, func.count(Attendance.id).label("total"), present.label("present")) \
+            .group_by(Attendance.date):
+        months[month_key(r.date)][0] += r.total
+        months[month_key(r.date)][1] += r.present
+    return students, {k: tuple(v) for k, v in months.items()}
+
+
+def _stored(db: Session):
+    students = {r.student_id: (r.total_days, r.present_days) for r in db.query(StudentAttendanceSummary)
+                if r.total_days}
+    months = {r.month: (r.total_days, r.present_days) for r in db.query(MonthAttendanceSummary)
+              if r.total_days}
+    return students, months
+
+
+def rebuild_summaries(db: Session):
+    students, months = _computed(db)
+    db.execute(delete(StudentAttendanceSummary))
+    db.execute(delete(MonthAttendanceSummary))
+    db.add_all(StudentAttendanceSummary(student_id=k, total_days=t, present_days=p) for k, (t, p) in students.items())
+    db.add_all(MonthAttendanceSummary(month=k, total_days=t, present_days=p) for k, (t, p) in months.items())
+    db.commit()
+    return {"students": len(students), "months": len(months)}
+
+
+def verify_summaries(db: Session):
+    computed, stored = _computed(db), _stored(db)
+    mismatches = []
+    for name, expected, actual in zip(("student", "month"), computed, stored):
+        for key in expected.keys() | actual.keys():
+            if expected.get(key) != actual.get(key):
+                mismatches.append({"type": name, "key": key,
+                                   "expected": expected.get(key), "stored": actual.get(key)})
+    return mismatches
+
+
+def backfill_summaries(db: Session):
+    # First start after the summary tables were added: fill them from history.
+    if db.query(StudentAttendanceSummary).first() is None and db.query(Attendance).first() is not None:
+        rebuild_summaries(db)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    session = SessionLocal()
+    try:
+        if command == "rebuild":
+            print(rebuild_summaries(session))
+        elif command == "verify":
+            problems = verify_summaries(session)
+            for p in problems:
+                print(p)
+            print("OK" if not problems else f"{len(problems)} mismatches")
+            sys.exit(1 if problems else 0)
+        else:
+            sys.exit("usage: python -m services.summary [rebuild|verify]")
+    finally:
+        session.close()
@@ -0,0 +1,71 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database.db import DIALECT_INSERT
+from models.table_schema import TableVersion
+
+# Per-table version counters behind the ETag / Last-Modified headers of the
+# roster and user listings. Every write to a listed table calls
+# bump_versions() inside its own transaction, so a version only moves when
+# the change commits. List routes compare the client's If-None-Match with
+# the current versions and answer 304 before loading or serializing rows.
+
+USERS = "users"
+STUDENTS = "students"
+ASSIGNMENTS = "teacher_student_map"
+
+
+def bump_versions(db: Session, *names):
+    table = TableVersion.__table__
+    stmt = DIALECT_INSERT[db.get_bind().dialect.name](table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"version": table.c.version + 1, "updated_at": stmt.excluded.updated_at})
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.execute(stmt, [{"name": name, "version": 1, "updated_at": now} for name in sorted(set(names))])
+
+
+def versions_stmt(names):
+    return select(TableVersion.name, TableVersion.version, TableVersion.updated_at) \
+        .where(TableVersion.name.in_(names)).order_by(TableVersion.name)
+
+
+def validators(rows, scope=""):
+    """ETag and Last-Modified for a listing built from the given version rows.
+
+    scope separates listings whose content differs per caller (a teacher's
+    own students) while they share the same tables.
+    """
+    rows = list(rows)
+    key = repr([(r.name, r.version, r.updated_at.isoformat()) for r in rows]) + scope
+    etag = 'W/"' + hashlib.sha256(key.encode()).hexdigest()[:20] + '"'
+    last_modified = max((r.updated_at for r in rows), default=None)
+    if last_modified is not None:
+        last_modified = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return etag, last_modified
+
+
+def list_validators(db: Session, names, scope=""):
+    return validators(db.execute(versions_stmt(names)), scope)
+
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    return "*" in tags or etag.removeprefix("W/") in [t.removeprefix("W/") for t in tags]
+
+
+def not_modified(request, response: Response, etag: str, last_modified: str = None):
+    """Set the validator headers; return a 304 response if the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,152 @@
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from database.db import SessionLocal
+from services.metrics import Counter, Histogram
+
+# Group commit for single-row attendance writes. With ATTENDANCE_WRITE_QUEUE
+# on, mark and update requests hand their work to one writer thread instead
+# of committing on their own connection. The writer gathers whatever arrives
+# within ATTENDANCE_WRITE_WINDOW_MS of the first operation (at most
+# ATTENDANCE_WRITE_BATCH of them), applies them in order in one transaction
+# and commits once; each request returns only after that commit. On SQLite
+# this turns a burst of roll-call clicks into one WAL sync and removes the
+# writers' contention for the database lock.
+#
+# An operation that raises an HTTPException must not have changed any rows,
+# which holds for mark_attendance and update_attendance (they hand their
+# reserved change sequence numbers back), so a refused operation leaves the
+# batch untouched. Any other failure rolls the batch back and its operations
+# are retried one transaction each, so only the failing caller sees the error.
+# Anything that escapes that fails the batch's callers and the writer moves
+# on. A caller waits at most ATTENDANCE_WRITE_TIMEOUT seconds and then gets a
+# 503; if the writer had not started its operation yet, it is dropped.
+# Each operation runs in its caller's context, so its statements count
+# towards that request's SQL metrics.
+
+ATTENDANCE_WRITE_QUEUE = os.getenv("ATTENDANCE_WRITE_QUEUE", "false").lower() == "true"
+ATTENDANCE_WRITE_WINDOW_MS = float(os.getenv("ATTENDANCE_WRITE_WINDOW_MS", "5"))
+ATTENDANCE_WRITE_BATCH = int(os.getenv("ATTENDANCE_WRITE_BATCH", "64"))
+ATTENDANCE_WRITE_TIMEOUT = float(os.getenv("ATTENDANCE_WRITE_TIMEOUT", "10"))
+ATTENDANCE_WRITE_RETRY_AFTER = os.getenv("ATTENDANCE_WRITE_RETRY_AFTER", "1")
+
+logger = logging.getLogger("attendance.write_queue")
+
+WRITE_BATCH_SIZE = Histogram("attendance_write_batch_size", "Operations committed together by the write queue",
+                             buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+WRITE_BATCH_RETRIED = Counter("attendance_write_batch_retried_total",
+                              "Write queue batches rolled back and retried one operation at a time")
+
+_queue = queue.SimpleQueue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _collect():
+    batch = [_queue.get()]
+    deadline = time.monotonic() + ATTENDANCE_WRITE_WINDOW_MS / 1000
+    while len(batch) < ATTENDANCE_WRITE_BATCH:
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=timeout))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run_alone(db: Session, future: Future, fn, args, context):
+    try:
+        result = context.run(fn, db, *args)
+        db.commit()
+    except BaseException as e:
+        db.rollback()
+        future.set_exception(e)
+    else:
+        future.set_result(result)
+
+
+def _commit_batch(db: Session, batch):
+    outcomes = []
+    try:
+        for future, fn, args, context in batch:
+            try:
+                outcomes.append((future, context.run(fn, db, *args), None))
+            except HTTPException as e:
+                outcomes.append((future, None, e))
+            context.run(db.flush)  # later operations in the batch read this one's rows
+        db.commit()
+    except Exception:
+        db.rollback()
+        WRITE_BATCH_RETRIED.inc()
+        for future, fn, args, context in batch:
+            _run_alone(db, future, fn, args, context)
+        return
+    WRITE_BATCH_SIZE.observe(len(batch))
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+
+def _fail(batch, error):
+    for future, *_ in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+def _write_loop():
+    global _writer
+    try:
+        while True:
+            # Callers that timed out have cancelled their futures; skip those operations.
+            batch = [op for op in _collect() if op[0].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                with SessionLocal() as db:
+                    _commit_batch(db, batch)
+            except Exception as e:
+                logger.exception("attendance write batch failed")
+                _fail(batch, e)
+    finally:
+        with _writer_lock:
+            if _writer is threading.current_thread():
+                _writer = None  # the next submit() starts a new writer
+
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="attendance-writer", daemon=True)
+            _writer.start()
+
+
+def submit(db: Session, fn, *args):
+    """Run fn(session, *args) and commit, through the writer when the queue is on.
+
+    Off, fn runs on the caller's session exactly as before. On, the caller's
+    session is not used and this blocks until the batch holding fn commits.
+    """
+    if not ATTENDANCE_WRITE_QUEUE:
+        result = fn(db, *args)
+        db.commit()
+        return result
+    _start_writer()
+    future = Future()
+    _queue.put((future, fn, args, contextvars.copy_context()))
+    try:
+        return future.result(timeout=ATTENDANCE_WRITE_TIMEOUT)
+    except TimeoutError:
+        detail = "Attendance write timed out, please retry" if future.cancel() else \
+            "Attendance write timed out and may still be applied"
+        raise HTTPException(503, detail, headers={"Retry-After": ATTENDANCE_WRITE_RETRY_AFTER})
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# The app binds its engine at import time, so point it at a scratch database
+# before any test module imports main.
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def login(email, role):
+    client.post("/register", json={"name": email, "email": email, "password": "pw", "role": role})
+    token = client.post("/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_refused_and_unchanged_writes_do_not_move_the_cursor():
+    admin = login("admin@changes.example.com", "admin")
+    teacher = login("teacher@changes.example.com", "teacher")
+    teacher_id = next(t["user_id"] for t in client.get("/teachers").json() if t["name"] == "teacher@changes.example.com")
+    std_id = client.post("/admin/student", json={"name": "Bo", "roll_number": "CH1", "std_class": 4},
+                         headers=admin).json()["std_id"]
+    client.post("/admin/assign", json={"teacher_id": teacher_id, "student_id": std_id}, headers=admin)
+    mark = {"student_id": std_id, "date": "2025-02-03", "status": True}
+    assert client.post("/teacher/attendance", json=mark, headers=teacher).status_code == 200
+    cursor = client.get("/attendance/changes", headers=admin).json()["cursor"]
+
+    assert client.post("/teacher/attendance", json=mark, headers=teacher).status_code == 400
+    assert client.post("/teacher/attendance", json={**mark, "overwrite": True}, headers=teacher).status_code == 200
+    assert client.put("/teacher/attendance", json=mark, headers=teacher).status_code == 200
+    assert client.put("/teacher/attendance", json={**mark, "date": "2025-02-04"}, headers=teacher).status_code == 404
+
+    page = client.get("/attendance/changes", params={"since": cursor}, headers=admin).json()
+    assert page["cursor"] == cursor and page["items"] == []
+
+    assert client.put("/teacher/attendance", json={**mark, "status": False}, headers=teacher).status_code == 200
+    page = client.get("/attendance/changes", params={"since": cursor}, headers=admin).json()
+    assert [r["student_id"] for r in page["items"]] == [std_id]
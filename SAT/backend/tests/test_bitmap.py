@@ -0,0 +1,65 @@
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from main import app
+from database.db import SessionLocal
+from models.schema import ReportFilters
+from models.table_schema import TableVersion
+from services import bitmap
+from services.content import _student_bitmap_stmt, _student_range_stmt
+
+client = TestClient(app)
+ADMIN = SimpleNamespace(role="admin", user_id=0)
+
+
+def login(email, role):
+    client.post("/register", json={"name": email, "email": email, "password": "pw", "role": role})
+    token = client.post("/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed(prefix, days):
+    admin = login(f"admin@{prefix}.example.com", "admin")
+    teacher = login(f"teacher@{prefix}.example.com", "teacher")
+    teacher_id = next(t["user_id"] for t in client.get("/teachers").json() if t["name"] == f"teacher@{prefix}.example.com")
+    rng = random.Random(prefix)
+    for i in range(3):
+        std_id = client.post("/admin/student", json={"name": f"S{i}", "roll_number": f"{prefix}{i}", "std_class": 2},
+                             headers=admin).json()["std_id"]
+        client.post("/admin/assign", json={"teacher_id": teacher_id, "student_id": std_id}, headers=admin)
+        for day in rng.sample(days, len(days) // 2):
+            client.post("/teacher/attendance", headers=teacher,
+                        json={"student_id": std_id, "date": day.isoformat(), "status": rng.random() < 0.7})
+
+
+def test_bitmap_ranges_match_attendance():
+    days = [date(2025, 1, 20) + timedelta(days=i) for i in range(45)]
+    seed("bitmap", days)
+    rng = random.Random(7)
+    with SessionLocal() as db:
+        bitmap.rebuild_bitmaps(db)
+        for _ in range(200):
+            filters = ReportFilters(date_from=rng.choice(days), date_to=rng.choice(days))
+            counts = bitmap.range_counts(db.scalars(_student_bitmap_stmt(ADMIN, filters)),
+                                         filters.date_from, filters.date_to)
+            expected = {r.student_id: (r.total_days, r.present_days)
+                        for r in db.execute(_student_range_stmt(ADMIN, filters))}
+            assert counts == expected, filters
+
+
+def test_bitmaps_rebuilt_after_running_without_them(monkeypatch):
+    with SessionLocal() as db:
+        monkeypatch.setattr(bitmap, "ATTENDANCE_BITMAPS", True)
+        bitmap.backfill_bitmaps(db)
+        assert db.get(TableVersion, bitmap.MAINTAINED) is not None
+
+        monkeypatch.setattr(bitmap, "ATTENDANCE_BITMAPS", False)
+        bitmap.backfill_bitmaps(db)
+        assert db.get(TableVersion, bitmap.MAINTAINED) is None
+        seed("stale", [date(2025, 5, 1) + timedelta(days=i) for i in range(6)])  # writes skip the bitmaps
+        assert bitmap.verify_bitmaps(db)
+
+        monkeypatch.setattr(bitmap, "ATTENDANCE_BITMAPS", True)
+        bitmap.backfill_bitmaps(db)
+        assert bitmap.verify_bitmaps(db) == []
@@ -0,0 +1,13 @@
+import os
+import pytest
+from fastapi import HTTPException
+from auths import hashing
+
+
+def test_broken_pool_is_replaced():
+    pool = hashing._get_pool()
+    with pytest.raises(HTTPException) as e:
+        hashing._run(os._exit, 1)  # kills a worker in each pool it tries
+    assert e.value.status_code == 503 and e.value.headers["Retry-After"] == hashing.HASH_RETRY_AFTER
+    assert hashing._get_pool() is not pool
+    assert hashing.verify_password("pw", hashing.hash_password("pw"))
@@ -0,0 +1,24 @@
+import re
+from fastapi.testclient import TestClient
+from main import app
+
+client = TestClient(app)
+
+
+def login(email, role):
+    client.post("/register", json={"name": email, "email": email, "password": "pw", "role": role})
+    token = client.post("/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def metric(name, route):
+    match = re.search(rf'^{name}{{method="GET",route="{re.escape(route)}"}} (\S+)$', client.get("/metrics").text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_rows_counts_fetched_select_rows():
+    admin = login("admin@metrics.example.com", "admin")
+    client.post("/admin/student", json={"name": "Mo", "roll_number": "M1", "std_class": 1}, headers=admin)
+    before = metric("http_request_db_rows_total", "/admin/students")
+    students = client.get("/admin/students", headers=admin).json()
+    assert metric("http_request_db_rows_total", "/admin/students") - before >= len(students) > 0
@@ -0,0 +1,58 @@
+from datetime import date
+from fastapi.testclient import TestClient
+from main import app
+from database.db import SessionLocal
+from models.table_schema import Attendance
+from services import report_cache
+from services.changes import next_change_seqs
+
+client = TestClient(app)
+
+
+def login(email, role):
+    client.post("/register", json={"name": email, "email": email, "password": "pw", "role": role})
+    token = client.post("/login", json={"email": email, "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_class_change_invalidates_class_filtered_reports():
+    admin = login("admin@cache.example.com", "admin")
+    teacher = login("teacher@cache.example.com", "teacher")
+    teacher_id = next(t["user_id"] for t in client.get("/teachers").json()
+                      if t["name"] == "teacher@cache.example.com")
+    student = {"name": "Ada", "roll_number": "C1", "std_class": 5}
+    std_id = client.post("/admin/student", json=student, headers=admin).json()["std_id"]
+    client.post("/admin/assign", json={"teacher_id": teacher_id, "student_id": std_id}, headers=admin)
+    client.post("/teacher/attendance", json={"student_id": std_id, "date": "2025-01-06", "status": True},
+                headers=teacher)
+
+    reports = ["/attendance/report", "/admin/report/student-wise", "/admin/report/month-wise"]
+    for path in reports:
+        assert client.get(path, params={"std_class": 5}, headers=admin).json()  # cached with the student
+
+    client.put(f"/admin/student/{std_id}", json={**student, "std_class": 6}, headers=admin)
+
+    for path in reports:
+        assert client.get(path, params={"std_class": 5}, headers=admin).json() == [], path
+    assert client.get("/attendance/report", params={"std_class": 5}, headers=teacher).json() == []
+    assert [r["student_id"] for r in client.get("/attendance/report", params={"std_class": 6},
+                                                headers=admin).json()] == [std_id]
+
+
+def test_memory_cache_sees_other_workers_writes(monkeypatch):
+    admin = login("admin@workers.example.com", "admin")
+    login("teacher@workers.example.com", "teacher")
+    teacher_id = next(t["user_id"] for t in client.get("/teachers").json()
+                      if t["name"] == "teacher@workers.example.com")
+    std_id = client.post("/admin/student", json={"name": "Wu", "roll_number": "W1", "std_class": 9},
+                         headers=admin).json()["std_id"]
+    params = {"student_id": std_id}
+    assert client.get("/attendance/report", params=params, headers=admin).json() == []
+
+    # Another worker's write: it commits, but only that worker's cache is told.
+    with SessionLocal() as db:
+        db.add(Attendance(student_id=std_id, date=date(2025, 3, 3), status=True, marked_by_teacher=teacher_id,
+                          change_seq=next_change_seqs(db)[0]))
+        db.commit()
+    monkeypatch.setattr(report_cache, "REPORT_VERSION_TTL", 0)
+    assert [r["student_id"] for r in client.get("/attendance/report", params=params, headers=admin).json()] == [std_id]
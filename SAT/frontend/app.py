@@ -1,10 +1,8 @@
 import streamlit as st
 import requests,re
 import pandas as pd
-import os
-
-
-BASE_URL = os.getenv("BACKEND_URL","http://127.0.0.1:8000")
+import datetime
+import client
 st.set_page_config(page_title= "Student Attendance Tracker",page_icon="📊")
 
 
@@ -39,10 +37,19 @@ def safe_json(res):
     except ValueError:
         return {"detail": res.text or "Server error. Please try again later."}
 
+# Report filters
+def report_filters(show_class=False):
+    today = datetime.date.today()
+    col1, col2, col3 = st.columns(3)
+    date_from = col1.date_input("From", today - datetime.timedelta(days=30))
+    date_to = col2.date_input("To", today)
+    std_class = col3.number_input("Class (0 = all)", min_value=0) if show_class else 0
+    return {"date_from": str(date_from), "date_to": str(date_to), "std_class": std_class or None}
+
 # Wakeup backend
 def wake_backend():
     try:
-        requests.get(f"{BASE_URL}/docs", timeout=10)
+        client.get("/docs", timeout=10)
     except:
         pass
 
@@ -76,7 +83,7 @@ def signup_page():
 
         wake_backend()
         payload = {"name": name, "email": email, "password": password, "role": role}
-        res = requests.post(f"{BASE_URL}/register", json=payload, timeout=15)
+        res = client.post("/register", json=payload, timeout=15)
 
         if res.status_code == 200:
             st.success("Account created successfully. Please login.")
@@ -103,7 +110,7 @@ def login_page():
     if login_clicked:
         wake_backend()
         payload = {"email": email, "password": password}
-        response = requests.post(f"{BASE_URL}/login", json=payload, timeout=15)
+        response = client.post("/login", json=payload, timeout=15)
 
         if response.status_code == 200:
             data = safe_json(response)
@@ -141,28 +148,42 @@ def dashboard():
 
             if st.button("➕ Add Student"):
                 payload = {"name": name, "roll_number": roll, "std_class": cls}
-                res = requests.post(f"{BASE_URL}/admin/student", json=payload, headers=headers)
+                res = client.post("/admin/student", json=payload, headers=headers)
                 if res.status_code == 200:
+                    client.invalidate_students()
                     st.success("Student added successfully")
                 else:
                     st.error(res.text)
 
+            st.subheader("📥 Import Students from CSV")
+            st.caption("Columns: name, roll_number, std_class and optional teacher_id")
+            roster = st.file_uploader("Roster CSV", type="csv")
+            if roster is not None and st.button("📥 Import"):
+                res = client.post("/admin/students/import", files={"file": (roster.name, roster.getvalue(), "text/csv")},
+                                  headers=headers, timeout=120)
+                if res.status_code == 200:
+                    result = res.json()
+                    client.invalidate_students()
+                    st.success(f'{result["created"]} students created, {result["assigned"]} assigned')
+                    if result["errors"]:
+                        st.table(result["errors"])
+                else:
+                    st.error(safe_json(res).get("detail", "Import failed"))
+
         if menu == "🔗 Assign Students":
             st.subheader("🔗 Assign / Unassign Students")
 
-            users_res = requests.get(f"{BASE_URL}/admin/users", headers=headers)
             try:
-                users = users_res.json()
-            except ValueError:
+                users = client.fetch_users(st.session_state.token)
+            except (requests.RequestException, ValueError):
                 st.error("Failed to load users")
                 return
 
             teachers = {u["name"]: u["user_id"] for u in users if u["role"] == "teacher"}
 
-            students_res = requests.get(f"{BASE_URL}/admin/students", headers=headers)
             try:
-                students = students_res.json()
-            except ValueError:
+                students = client.fetch_students(st.session_state.token)
+            except (requests.RequestException, ValueError):
                 st.error("Failed to load students")
                 return
 
@@ -181,16 +202,17 @@ def dashboard():
                         "teacher_id": teachers[teacher_name],
                         "student_id": students_map[student_name]
                     }
-                    res = requests.post(f"{BASE_URL}/admin/assign", json=payload, headers=headers)
+                    res = client.post("/admin/assign", json=payload, headers=headers)
                     if res.status_code == 200:
+                        client.invalidate_assignments()
                         st.success("Student assigned successfully")
                     else:
                         st.error(res.text)
 
             with col2:
                 if st.button("❌ Unassign"):
-                    res = requests.delete(
-                        f"{BASE_URL}/admin/unassign",
+                    res = client.delete(
+                        "/admin/unassign",
                         params={
                             "teacher_id": teachers[teacher_name],
                             "student_id": students_map[student_name]
@@ -198,21 +220,49 @@ def dashboard():
                         headers=headers
                     )
                     if res.status_code == 200:
+                        client.invalidate_assignments()
                         st.success("Student unassigned successfully")
                         st.rerun()
                     else:
                         st.error(res.text)
 
+            with st.expander("Bulk Assign / Unassign"):
+                by_class = st.radio("Select students by", ["Class", "List"], horizontal=True) == "Class"
+                if by_class:
+                    classes = sorted({s["std_class"] for s in students})
+                    payload = {"teacher_id": teachers[teacher_name],
+                               "std_class": st.selectbox("Class", classes)}
+                else:
+                    picked = st.multiselect("Students", students_map.keys())
+                    payload = {"teacher_id": teachers[teacher_name],
+                               "student_ids": [students_map[name] for name in picked]}
+
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    if st.button("✅ Assign All"):
+                        res = client.post("/admin/assign/bulk", json=payload, headers=headers)
+                        if res.status_code == 200:
+                            client.invalidate_assignments()
+                            st.success(res.json()["message"])
+                        else:
+                            st.error(res.text)
+                with col2:
+                    if st.button("❌ Unassign All"):
+                        res = client.post("/admin/unassign/bulk", json=payload, headers=headers)
+                        if res.status_code == 200:
+                            client.invalidate_assignments()
+                            st.success(res.json()["message"])
+                        else:
+                            st.error(res.text)
+
         if menu == "📅 Attendance Reports":
             st.subheader("📅 Attendance Reports")
-            res = requests.get(f"{BASE_URL}/attendance/report", headers=headers)
-
-            if res.status_code != 200:
+            filters = report_filters(show_class=True)
+            try:
+                data = client.fetch_report(st.session_state.token, **filters)
+            except requests.RequestException:
                 st.error("Unable to fetch report")
                 return
-
-            try:
-                data = res.json()
             except ValueError:
                 st.error("Invalid response from server")
                 return
@@ -221,20 +271,10 @@ def dashboard():
                 st.info("Attendance is not submitted yet.")
                 return
 
-            teachers = requests.get(f"{BASE_URL}/teachers", headers=headers).json()
-            students = requests.get(f"{BASE_URL}/admin/students", headers=headers).json()
-
-            teacher_map = {
-                t["user_id"]: f'{t["name"]} - ID: {t["user_id"]}'
-                for t in teachers
-            }
-
             df = pd.DataFrame(data)
             df["status"] = df["status"].apply(lambda x: "Present" if x else "Absent")
-            df["marked_by_teacher"] = df["marked_by_teacher"].map(teacher_map)
-            df["student_name"] = df["student_id"].map(
-                {s["std_id"]: f'{s["name"]} (ID {s["std_id"]})' for s in students}
-            )
+            df["student_name"] = df["student_name"] + " (ID " + df["student_id"].astype(str) + ")"
+            df["marked_by_teacher"] = df["teacher_name"] + " - ID: " + df["marked_by_teacher"].astype(str)
 
             st.table(df[["student_name", "date", "status", "marked_by_teacher"]])
 
@@ -249,8 +289,8 @@ def dashboard():
                     "date": date,
                     "status": status == "Present"
                 }
-                update_res = requests.put(
-                    f"{BASE_URL}/admin/attendance",
+                update_res = client.put(
+                    "/admin/attendance",
                     json=payload,
                     headers=headers
                 )
@@ -262,40 +302,39 @@ def dashboard():
 
         if menu == "🗂 View Users":
             st.subheader("🗂 View Users")
-            res = requests.get(f"{BASE_URL}/admin/users", headers=headers)
-
-            if res.status_code == 200:
-                try:
-                    users = res.json()
-                except ValueError:
-                    st.error("Invalid user data")
-                    return
+            try:
+                users = client.fetch_users(st.session_state.token)
+            except (requests.RequestException, ValueError):
+                st.error("Invalid user data")
+                return
 
-                if not users:
-                    st.info("No users found.")
-                else:
-                    st.table(users)
+            if not users:
+                st.info("No users found.")
+            else:
+                st.table(users)
 
-                    st.subheader("Remove Teacher / User")
-                    user_map = {
-                        f'{u["name"]} ({u["role"]}) - ID {u["user_id"]}': u["user_id"]
-                        for u in users if u["role"] == "teacher"
-                    }
-                    selected_user = st.selectbox("Select Teacher to Remove", user_map.keys())
-
-                    col1, col2 = st.columns([2, 1])
-                    with col2:
-                        if st.button("Remove Teacher"):
-                            user_id = user_map[selected_user]
-                            res = requests.delete(
-                                f"{BASE_URL}/admin/teacher/{user_id}",
-                                headers=headers
-                            )
-                            if res.status_code == 200:
-                                st.success("Teacher deleted successfully")
-                                st.rerun()
-                            else:
-                                st.error(res.text)
+                st.subheader("Remove Teacher / User")
+                user_map = {
+                    f'{u["name"]} ({u["role"]}) - ID {u["user_id"]}': u["user_id"]
+                    for u in users if u["role"] == "teacher"
+                }
+                selected_user = st.selectbox("Select Teacher to Remove", user_map.keys())
+
+                col1, col2 = st.columns([2, 1])
+                with col2:
+                    if st.button("Remove Teacher"):
+                        user_id = user_map[selected_user]
+                        res = client.delete(
+                            f"/admin/teacher/{user_id}",
+                            headers=headers
+                        )
+                        if res.status_code == 200:
+                            client.invalidate_users()
+                            client.invalidate_assignments()
+                            st.success("Teacher deleted successfully")
+                            st.rerun()
+                        else:
+                            st.error(res.text)
 
         with st.sidebar:
             if st.button("🚪 Logout"):
@@ -312,29 +351,25 @@ def dashboard():
 
         if menu == "👩‍🎓 My Students":
             st.subheader("My Students")
-            res = requests.get(f"{BASE_URL}/teacher/students", headers=headers)
-            if res.status_code == 200:
-                try:
-                    data = res.json()
-                except ValueError:
-                    st.error("Invalid student data")
-                    return
-
-                if not data:
-                    st.info("No students assigned yet.")
-                else:
-                    df = pd.DataFrame(data)
-                    st.table(df)
+            try:
+                data = client.fetch_my_students(st.session_state.token)
+            except (requests.RequestException, ValueError):
+                st.error("Invalid student data")
+                return
+
+            if not data:
+                st.info("No students assigned yet.")
+            else:
+                df = pd.DataFrame(data)
+                st.table(df)
 
         if menu == "✍️ Mark Attendance":
             st.subheader("Mark Attendance")
-            res = requests.get(f"{BASE_URL}/teacher/students", headers=headers)
-            if res.status_code != 200:
+            try:
+                students = client.fetch_my_students(st.session_state.token)
+            except requests.RequestException:
                 st.error("Unable to load assigned students")
                 return
-
-            try:
-                students = res.json()
             except ValueError:
                 st.error("Invalid student data")
                 return
@@ -359,8 +394,8 @@ def dashboard():
                     "date": str(date),
                     "status": status == "Present"
                 }
-                res = requests.post(
-                    f"{BASE_URL}/teacher/attendance",
+                res = client.post(
+                    "/teacher/attendance",
                     json=payload,
                     headers=headers
                 )
@@ -374,14 +409,12 @@ def dashboard():
 
         if menu == "📅 Attendance Reports":
             st.subheader("Attendance Reports")
-            res = requests.get(f"{BASE_URL}/attendance/report", headers=headers)
-
-            if res.status_code != 200:
+            filters = report_filters()
+            try:
+                data = client.fetch_report(st.session_state.token, **filters)
+            except requests.RequestException:
                 st.error("Unable to fetch report")
                 return
-
-            try:
-                data = res.json()
             except ValueError:
                 st.error("Invalid report data")
                 return
@@ -390,15 +423,9 @@ def dashboard():
                 st.info("Attendance is not submitted yet.")
                 return
 
-            teachers = requests.get(f"{BASE_URL}/teachers", headers=headers).json()
-            teacher_map = {
-                t["user_id"]: f'{t["name"]} (ID: {t["user_id"]})'
-                for t in teachers
-            }
-
             df = pd.DataFrame(data)
             df["status"] = df["status"].apply(lambda x: "Present" if x else "Absent")
-            df["marked_by_teacher"] = df["marked_by_teacher"].map(teacher_map)
+            df["marked_by_teacher"] = df["teacher_name"] + " (ID: " + df["marked_by_teacher"].astype(str) + ")"
             st.table(df[["student_id", "date", "status", "marked_by_teacher"]])
 
             st.subheader("🛠 Update Attendance")
@@ -412,8 +439,8 @@ def dashboard():
                     "date": date,
                     "status": status == "Present"
                 }
-                update_res = requests.put(
-                    f"{BASE_URL}/teacher/attendance",
+                update_res = client.put(
+                    "/teacher/attendance",
                     json=payload,
                     headers=headers
                 )
@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+BASE_URL = os.getenv("BACKEND_URL","http://127.0.0.1:8000")
+REFERENCE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "60"))
+
+
+# One pooled keep-alive session shared by every Streamlit rerun and user.
+@st.cache_resource
+def _session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def get(path, **kwargs):
+    return _session().get(f"{BASE_URL}{path}", **kwargs)
+
+
+def post(path, **kwargs):
+    return _session().post(f"{BASE_URL}{path}", **kwargs)
+
+
+def put(path, **kwargs):
+    return _session().put(f"{BASE_URL}{path}", **kwargs)
+
+
+def delete(path, **kwargs):
+    return _session().delete(f"{BASE_URL}{path}", **kwargs)
+
+
+def fetch_report(token, **filters):
+    # Filtered, server-joined attendance rows; follows keyset pages to the end of the range.
+    params = {k: v for k, v in filters.items() if v is not None}
+    items = []
+    while True:
+        res = get("/attendance/report/detailed", params=params, headers=_auth(token))
+        res.raise_for_status()
+        page = res.json()
+        items.extend(page["items"])
+        if not page["next_cursor"]:
+            return items
+        params["cursor"] = page["next_cursor"]
+
+
+# REFERENCE DATA
+# Cached per token for REFERENCE_TTL seconds. Failed calls raise, so errors
+# are never cached; callers catch requests.RequestException / ValueError.
+# Once the TTL expires the request carries the last ETag, and an unchanged
+# list comes back as an empty 304 that reuses the body we already hold.
+
+VALIDATED_ENTRIES = 256
+
+
+@st.cache_resource
+def _validated():
+    return OrderedDict(), threading.Lock()
+
+
+def _fetch(path, token):
+    entries, lock = _validated()
+    key = (path, token)
+    with lock:
+        etag, body = entries.get(key, (None, None))
+    headers = _auth(token)
+    if etag:
+        headers["If-None-Match"] = etag
+    res = get(path, headers=headers)
+    if res.status_code == 304 and body is not None:
+        with lock:
+            entries.move_to_end(key)
+        return body
+    res.raise_for_status()
+    body = res.json()
+    if res.headers.get("ETag"):
+        with lock:
+            entries[key] = (res.headers["ETag"], body)
+            entries.move_to_end(key)
+            while len(entries) > VALIDATED_ENTRIES:
+                entries.popitem(last=False)
+    return body
+
+
+@st.cache_data(ttl=REFERENCE_TTL, show_spinner=False)
+def fetch_users(token):
+    return _fetch("/admin/users", token)
+
+
+@st.cache_data(ttl=REFERENCE_TTL, show_spinner=False)
+def fetch_students(token):
+    return _fetch("/admin/students", token)
+
+
+@st.cache_data(ttl=REFERENCE_TTL, show_spinner=False)
+def fetch_teachers(token):
+    return _fetch("/teachers", token)
+
+
+@st.cache_data(ttl=REFERENCE_TTL, show_spinner=False)
+def fetch_my_students(token):
+    return _fetch("/teacher/students", token)
+
+
+def invalidate_users():
+    fetch_users.clear()
+    fetch_teachers.clear()
+
+
+def invalidate_students():
+    fetch_students.clear()
+    fetch_my_students.clear()
+
+
+def invalidate_assignments():
+    fetch_my_students.clear()